@@ -13,6 +13,9 @@ class BaseConfig(AppConfig):
     name = "base"
 
     def ready(self):
+        # Connect the signal receivers
+        from . import signals  # noqa: F401
+
         # Initialize the Firebase app
         cert = FIREBASE_SERVICE_ACCOUNT_KEY_PATH
         if FIREBASE_SERVICE_ACCOUNT_KEY_JSON:
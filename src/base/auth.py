@@ -1,11 +1,12 @@
 import time
 from typing import Tuple
-from firebase_admin import auth
-from rest_framework.authentication import BaseAuthentication
+from django.db import IntegrityError, transaction
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from razexOne.settings import ACTIVE_AUTH_BACKENDS
 from .models import User
 from .helpers.jwt import decode_jwt, encode_jwt
+from .helpers.firebase import FirebaseTokenVerifier, FirebaseProfileService
 
 
 class DjangoProxyBackend(object):
@@ -50,39 +51,41 @@ class FirebaseAuthentication(RazexBaseAuthentication):
 
         try:
             # Verify Firebase token
-            decoded_token = auth.verify_id_token(id_token)
+            decoded_token = FirebaseTokenVerifier.get_instance().verify(id_token)
             firebase_uid = decoded_token["uid"]
 
             # Try to get user from database
             try:
                 user = User.objects.get_user(uid=firebase_uid, auth_backend=self.key)
             except User.DoesNotExist:
-                # get user info from firebase
-                user_info = auth.get_user(firebase_uid)
-                email = user_info.email
-                name = user_info.display_name
-                phone_number = user_info.phone_number
-                # if not name:
-                #     if email:
-                #         name = email.split("@")[0]
-                #     elif phone_number:
-                #         name = phone_number
-                #     else:
-                #         name = firebase_uid
-                # Create user if not exists
-                user = User.objects.create_user(
-                    uid=firebase_uid,
-                    auth_backend=self.key,
-                    email=email,
-                    name=name,
-                    phone_number=phone_number,
-                )
+                user = self.create_user_from_claims(decoded_token)
 
             return (user, None)  # DRF requires (user, auth) tuple
         except Exception as exc:
             raise AuthenticationFailed("Invalid Firebase token") from exc
 
 
+    def create_user_from_claims(self, claims: dict) -> User:
+        """
+        Creates the user from the ID token alone, the rest of the profile is filled in the background.
+        """
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    uid=claims["uid"],
+                    auth_backend=self.key,
+                    email=claims.get("email"),
+                    is_email_verified=bool(claims.get("email") and claims.get("email_verified")),
+                    name=claims.get("name"),
+                    phone_number=claims.get("phone_number"),
+                )
+        except IntegrityError:
+            # Created by a concurrent request of the same user
+            return User.objects.get(uid=claims["uid"], auth_backend=self.key)
+        FirebaseProfileService.schedule_enrichment(user)
+        return user
+
+
 class NativeAuthentication(RazexBaseAuthentication):
     def __init__(self):
         super().__init__()
@@ -97,6 +100,12 @@ class NativeAuthentication(RazexBaseAuthentication):
     def get_uid_from_jwt_token(self, token: str) -> Tuple[str, str]:
         try:
             data = decode_jwt(token)
+        except Exception as exc:
+            raise AuthenticationFailed("Invalid JWT Token") from exc
+        return self.get_uid_from_claims(data)
+
+    def get_uid_from_claims(self, data: dict) -> str:
+        try:
             # If auth_backend field is not present, return None
             if "auth_backend" not in data:
                 return None
@@ -129,8 +138,18 @@ class NativeAuthentication(RazexBaseAuthentication):
         auth_header = request.headers.get("Jwt")
         if not auth_header:
             return None
+        try:
+            data = decode_jwt(auth_header)
+        except Exception as exc:
+            raise AuthenticationFailed("Invalid JWT Token") from exc
+        return self.authenticate_claims(data)
+
+    def authenticate_claims(self, data: dict):
+        """
+        Authenticate with the already decoded claims of the Jwt header.
+        """
         # Extract uid from jwt token
-        uid = self.get_uid_from_jwt_token(auth_header)
+        uid = self.get_uid_from_claims(data)
         if not uid:
             return None
         # Try to get user from database
@@ -160,6 +179,9 @@ class OTPAuthentication(RazexBaseAuthentication):
             data = decode_jwt(token)
         except Exception as exc:
             raise AuthenticationFailed("Invalid JWT Token") from exc
+        return self.get_phone_from_claims(data)
+
+    def get_phone_from_claims(self, data: dict) -> str:
         # Check for auth_backend field
         if "auth_backend" not in data:
             return None
@@ -184,8 +206,18 @@ class OTPAuthentication(RazexBaseAuthentication):
         auth_header = request.headers.get("Jwt")
         if not auth_header:
             return None
+        try:
+            data = decode_jwt(auth_header)
+        except Exception as exc:
+            raise AuthenticationFailed("Invalid JWT Token") from exc
+        return self.authenticate_claims(data)
+
+    def authenticate_claims(self, data: dict):
+        """
+        Authenticate with the already decoded claims of the Jwt header.
+        """
         # Extract phone number from jwt token
-        phone_number = self.get_phone_from_jwt_token(auth_header)
+        phone_number = self.get_phone_from_claims(data)
         if not phone_number:
             return None
         # Try to get user from database
@@ -233,3 +265,50 @@ class AuthManager:
         if not hasattr(cls, "instance"):
             cls.instance = cls()
         return cls.instance
+
+
+class RazexAuthentication(BaseAuthentication):
+    """
+    Single authentication class for the API, instead of trying every backend in turn.
+
+    The headers are inspected once: a Bearer token goes to Firebase, a Jwt header
+    is decoded once and handed to the backend named by its auth_backend claim.
+    Sessions, used by the admin and the browsable API, are only looked up when
+    there is no token.
+    """
+
+    FIREBASE_KEY = "firebase"
+
+    def __init__(self):
+        self.session_authentication = SessionAuthentication()
+
+    def authenticate(self, request):
+        result = self.authenticate_token(request)
+        if result is not None:
+            return result
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer ") or request.headers.get("Jwt"):
+            # Token of an unknown backend, the same as with the backends alone
+            return None
+        return self.session_authentication.authenticate(request)
+
+    def authenticate_token(self, request):
+        """
+        Authenticate with the token headers only, returns None when there is no token for an active backend.
+        """
+        backends = AuthManager.get_instance().backends
+        auth_header = request.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            return backends[self.FIREBASE_KEY].authenticate(request)
+
+        jwt_header = request.headers.get("Jwt")
+        if not jwt_header:
+            return None
+        try:
+            data = decode_jwt(jwt_header)
+        except Exception as exc:
+            raise AuthenticationFailed("Invalid JWT Token") from exc
+        backend = backends.get(data.get("auth_backend"))
+        if backend is None or not hasattr(backend, "authenticate_claims"):
+            return None
+        return backend.authenticate_claims(data)
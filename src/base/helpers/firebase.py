@@ -0,0 +1,230 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import jwt as pyjwt
+import requests
+import firebase_admin
+from firebase_admin import auth
+from cachetools import LRUCache
+from cryptography.x509 import load_pem_x509_certificate
+from django.core.cache import cache
+from django.db import connection, transaction
+from base.models import User
+from razexOne.settings import (
+    FIREBASE_TOKEN_CACHE_SIZE,
+    FIREBASE_TOKEN_SHARED_CACHE,
+    FIREBASE_CERTS_MIN_REFRESH_INTERVAL,
+    FIREBASE_PROFILE_WORKERS,
+)
+
+CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+
+class InvalidIdToken(Exception):
+    pass
+
+
+class FirebaseTokenVerifier:
+    """
+    Verifies Firebase ID tokens like firebase_admin.auth.verify_id_token, but keeps
+    the parsed Google certificates in memory, refreshed by a background thread
+    before they expire, and caches the claims of verified tokens until their exp.
+
+    Verified tokens are kept by hash in a per process LRU and, with
+    FIREBASE_TOKEN_SHARED_CACHE, in the Django cache for the other workers.
+    """
+
+    def __init__(self, project_id=None):
+        self.project_id = project_id
+        self.public_keys = {}
+        self.tokens = LRUCache(maxsize=FIREBASE_TOKEN_CACHE_SIZE)
+        self.lock = threading.Lock()
+        self.refresher_started = False
+        self.last_refresh = 0
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Singleton pattern to get the FirebaseTokenVerifier instance.
+        """
+        if not hasattr(cls, "instance"):
+            cls.instance = cls()
+        return cls.instance
+
+    @staticmethod
+    def cache_key(token):
+        return f"firebase_token_{hashlib.sha256(token.encode()).hexdigest()}"
+
+    def verify(self, token):
+        """
+        Returns the claims of the token, with the user id as uid, raises InvalidIdToken.
+        """
+        key = self.cache_key(token)
+        now = time.time()
+        with self.lock:
+            claims = self.tokens.get(key)
+        if claims is None and FIREBASE_TOKEN_SHARED_CACHE:
+            claims = cache.get(key)
+        if claims is not None and claims["exp"] > now:
+            return claims
+
+        claims = self.verify_signature(token)
+        with self.lock:
+            self.tokens[key] = claims
+        if FIREBASE_TOKEN_SHARED_CACHE:
+            cache.set(key, claims, timeout=max(int(claims["exp"] - now), 1))
+        return claims
+
+    def verify_signature(self, token):
+        """
+        Full verification of the token, the same checks as firebase_admin.
+        """
+        try:
+            header = pyjwt.get_unverified_header(token)
+        except pyjwt.PyJWTError as e:
+            raise InvalidIdToken(str(e))
+        if header.get("alg") != "RS256":
+            raise InvalidIdToken("Invalid algorithm")
+        public_key = self.get_public_key(header.get("kid"))
+        project_id = self.get_project_id()
+        try:
+            claims = pyjwt.decode(
+                token,
+                public_key,
+                algorithms=["RS256"],
+                audience=project_id,
+                issuer=f"{ISSUER_PREFIX}{project_id}",
+                options={"require": ["exp", "iat", "sub"]},
+            )
+        except pyjwt.PyJWTError as e:
+            raise InvalidIdToken(str(e))
+        sub = claims["sub"]
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise InvalidIdToken("Invalid subject")
+        if claims.get("auth_time", 0) > time.time():
+            raise InvalidIdToken("Token auth_time is in the future")
+        claims["uid"] = sub
+        return claims
+
+    def get_project_id(self):
+        if self.project_id is None:
+            try:
+                self.project_id = firebase_admin.get_app().project_id
+            except ValueError:
+                raise InvalidIdToken("Firebase is not configured")
+            if not self.project_id:
+                raise InvalidIdToken("Firebase project id is not set")
+        return self.project_id
+
+    def get_public_key(self, kid):
+        if not self.public_keys:
+            # First use, later refreshes run in the background
+            self.start_refresher()
+        public_key = self.public_keys.get(kid)
+        if public_key is None and self.claim_refresh():
+            # Google may have rotated the keys before the refresh
+            try:
+                self.refresh_certs()
+            except requests.RequestException as e:
+                raise InvalidIdToken(f"Failed to fetch the Firebase certificates: {e}")
+            public_key = self.public_keys.get(kid)
+        if public_key is None:
+            raise InvalidIdToken("Unknown key id")
+        return public_key
+
+    def claim_refresh(self):
+        """
+        Whether an unknown key id may refresh the certificates now, at most once per
+        FIREBASE_CERTS_MIN_REFRESH_INTERVAL, so that tokens with made up key ids can
+        not make every request fetch them.
+        """
+        with self.lock:
+            now = time.time()
+            if now - self.last_refresh < FIREBASE_CERTS_MIN_REFRESH_INTERVAL:
+                return False
+            self.last_refresh = now
+            return True
+
+    def refresh_certs(self):
+        """
+        Fetches and parses the Google certificates, returns their max age in seconds.
+        """
+        with self.lock:
+            self.last_refresh = time.time()
+        response = requests.get(CERTS_URL, timeout=5)
+        response.raise_for_status()
+        self.public_keys = {
+            kid: load_pem_x509_certificate(cert.encode()).public_key()
+            for kid, cert in response.json().items()
+        }
+        max_age = 0
+        for directive in response.headers.get("Cache-Control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+            if name == "max-age" and value.isdigit():
+                max_age = int(value)
+        return max_age
+
+    def start_refresher(self):
+        with self.lock:
+            if self.refresher_started:
+                return
+            self.refresher_started = True
+        max_age = 0
+        try:
+            max_age = self.refresh_certs()
+        except requests.RequestException as e:
+            print(f"Failed to fetch the Firebase certificates: {e}")
+        threading.Thread(target=self._refresh_loop, args=(max_age,), daemon=True).start()
+
+    def _refresh_loop(self, max_age):
+        while True:
+            # Refresh at half the max age, well before the keys change
+            time.sleep(max(max_age // 2, FIREBASE_CERTS_MIN_REFRESH_INTERVAL))
+            try:
+                max_age = self.refresh_certs()
+            except requests.RequestException as e:
+                print(f"Failed to refresh the Firebase certificates: {e}")
+                max_age = 0
+
+
+class FirebaseProfileService:
+    """
+    Completes the users created from the claims of their first ID token with their
+    Firebase profile, in background threads so that sign ups do not wait for the Admin SDK.
+    Only the fields still empty are filled, the user may have changed the others meanwhile.
+    """
+
+    # User field -> Firebase UserRecord attribute
+    FIELDS = {"email": "email", "name": "display_name", "phone_number": "phone_number"}
+
+    executor = ThreadPoolExecutor(
+        max_workers=FIREBASE_PROFILE_WORKERS, thread_name_prefix="firebase-profile"
+    )
+
+    @classmethod
+    def schedule_enrichment(cls, user):
+        """
+        Enrich the user once it is committed.
+        """
+        user_id = user.pk
+        transaction.on_commit(lambda: cls.executor.submit(cls.enrich, user_id))
+
+    @classmethod
+    def enrich(cls, user_id):
+        try:
+            user = User.objects.get(pk=user_id)
+            user_info = auth.get_user(user.uid)
+            update_fields = []
+            for field, attribute in cls.FIELDS.items():
+                value = getattr(user_info, attribute)
+                if value and not getattr(user, field):
+                    setattr(user, field, value)
+                    update_fields.append(field)
+            if update_fields:
+                user.save(update_fields=update_fields)
+        except Exception as e:
+            print(f"Failed to enrich the Firebase profile of user {user_id}: {e}")
+        finally:
+            connection.close()
@@ -0,0 +1,187 @@
+import base64
+import json
+import os
+from io import BytesIO
+import redis
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageFilter, ImageOps
+from rest_framework import serializers
+from razexOne.redis import redis_client, blocking_redis_client
+from razexOne.settings import (
+    IMAGE_VARIANT_WIDTHS,
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_PLACEHOLDER_WIDTH,
+)
+
+# Pillow format -> file extension
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+# Redis list of the images waiting for the image_variant_worker command
+QUEUE_KEY = "image_variants_queue"
+
+
+def get_variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def _encode(image, image_format, quality):
+    buffer = BytesIO()
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _resize(image, width):
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def get_placeholder(image):
+    """
+    Tiny blurred JPEG as a data URI, shown while the real image loads.
+    """
+    small = _resize(image, IMAGE_PLACEHOLDER_WIDTH).filter(ImageFilter.GaussianBlur(1))
+    data = base64.b64encode(_encode(small, "JPEG", 50)).decode()
+    return f"data:image/jpeg;base64,{data}"
+
+
+def generate_image_variants(field_file):
+    """
+    Saves the resized copies of the image next to it in its storage and returns their description:
+    {"source", "width", "height", "placeholder", "variants": [{"width", "format", "name"}]}
+    Only widths smaller than the original are generated, or the original width if all are larger.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, "rb") as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    widths = [width for width in IMAGE_VARIANT_WIDTHS if width < image.width]
+    if not widths:
+        widths = [image.width]
+    root, _ = os.path.splitext(field_file.name)
+    variants = []
+    for width in widths:
+        resized = _resize(image, width) if width != image.width else image
+        for image_format in IMAGE_VARIANT_FORMATS:
+            content = _encode(resized, image_format, IMAGE_VARIANT_QUALITY)
+            name = storage.save(
+                f"{root}_{width}w.{EXTENSIONS[image_format]}", ContentFile(content)
+            )
+            variants.append(
+                {"width": width, "format": EXTENSIONS[image_format], "name": name}
+            )
+    return {
+        "source": field_file.name,
+        "width": image.width,
+        "height": image.height,
+        "placeholder": get_placeholder(image),
+        "variants": variants,
+    }
+
+
+def delete_image_variants(storage, variants):
+    for variant in (variants or {}).get("variants", []):
+        try:
+            storage.delete(variant["name"])
+        except Exception as e:
+            print(f"Failed to delete image variant {variant['name']}: {e}")
+
+
+def refresh_image_variants(instance, field_name):
+    """
+    Regenerates the variants of the image field when the image changed since they were generated.
+    The variants are saved in the <field_name>_variants JSON field of the instance.
+    """
+    field_file = getattr(instance, field_name)
+    variants_field = get_variants_field(field_name)
+    current = getattr(instance, variants_field) or {}
+    source = field_file.name if field_file else None
+    if current.get("source") == source:
+        return
+    variants = {}
+    if source:
+        try:
+            variants = generate_image_variants(field_file)
+        except Exception as e:
+            # Clients fall back to the original image
+            print(f"Failed to generate the variants of {source}: {e}")
+            return
+    delete_image_variants(field_file.storage, current)
+    setattr(instance, variants_field, variants)
+    update_fields = [variants_field]
+    if hasattr(instance, "updated_at"):
+        update_fields.append("updated_at")
+    instance.save(update_fields=update_fields)
+
+
+def schedule_image_variants(instance, field_name):
+    """
+    Queue the image for the image_variant_worker command once the upload is committed,
+    when it changed since the variants were generated.
+    """
+    field_file = getattr(instance, field_name)
+    current = getattr(instance, get_variants_field(field_name)) or {}
+    if current.get("source") == (field_file.name if field_file else None):
+        return
+    job = json.dumps({"model": instance._meta.label, "pk": str(instance.pk), "field": field_name})
+    transaction.on_commit(lambda: _enqueue(job))
+
+
+def _enqueue(job):
+    try:
+        redis_client.lpush(QUEUE_KEY, job)
+    except redis.RedisError as e:
+        # The worker catches up on the outdated images when it starts
+        print(f"Failed to queue the image variants {job}: {e}")
+
+
+def pop_image_variants(timeout):
+    """
+    Returns the next queued (instance, field_name), instance is None if it was deleted since.
+    """
+    item = blocking_redis_client.brpop(QUEUE_KEY, timeout=timeout)
+    if not item:
+        return None
+    job = json.loads(item[1])
+    instance = apps.get_model(job["model"]).objects.filter(pk=job["pk"]).first()
+    return instance, job["field"]
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read only description of the variants of an image field, with their urls:
+    {"width", "height", "placeholder", "variants": [{"width", "format", "url"}]}, None until generated.
+    """
+
+    def __init__(self, field_name, **kwargs):
+        self.image_field_name = field_name
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        variants = getattr(instance, get_variants_field(self.image_field_name))
+        if not variants:
+            return None
+        storage = getattr(instance, self.image_field_name).storage
+        return {
+            "width": variants["width"],
+            "height": variants["height"],
+            "placeholder": variants["placeholder"],
+            "variants": [
+                {
+                    "width": variant["width"],
+                    "format": variant["format"],
+                    "url": storage.url(variant["name"]),
+                }
+                for variant in variants["variants"]
+            ],
+        }
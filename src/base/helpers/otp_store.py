@@ -0,0 +1,134 @@
+import hashlib
+import hmac
+import secrets
+import redis
+from razexOne.redis import redis_client
+from razexOne.settings import (
+    SECRET_KEY,
+    OTP_EXPIRY_AFTER_MINUTES,
+    OTP_SEND_INTERVAL_SECONDS,
+    OTP_MAX_ATTEMPTS,
+    OTP_IP_WINDOW_SECONDS,
+    OTP_IP_SEND_LIMIT,
+    OTP_IP_VERIFY_LIMIT,
+)
+
+# Counts an attempt on the code and deletes it when it matches or when there are no attempts left.
+# Returns 1 if the code matches, 0 if not, -1 without a code and -2 when out of attempts.
+VERIFY_SCRIPT = redis_client.register_script(
+    """
+    local code_hash = redis.call('HGET', KEYS[1], 'hash')
+    if not code_hash then
+        return -1
+    end
+    local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+    if code_hash == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return 1
+    end
+    if attempts >= tonumber(ARGV[2]) then
+        redis.call('DEL', KEYS[1])
+        return -2
+    end
+    return 0
+    """
+)
+
+
+class OTPRateLimited(Exception):
+    pass
+
+
+class InvalidOTP(Exception):
+    pass
+
+
+class OTPStore:
+    """
+    One time passwords kept in Redis, so that sending and verifying them does not touch the database.
+
+    Codes are stored as HMACs and expire with their key after OTP_EXPIRY_AFTER_MINUTES.
+    A phone number can get a new code every OTP_SEND_INTERVAL_SECONDS and has OTP_MAX_ATTEMPTS
+    tries per code. Each IP can send OTP_IP_SEND_LIMIT codes and try OTP_IP_VERIFY_LIMIT codes
+    per OTP_IP_WINDOW_SECONDS.
+    """
+
+    @staticmethod
+    def code_key(phone_number):
+        return f"otp_{phone_number}"
+
+    @staticmethod
+    def sent_key(phone_number):
+        return f"otp_{phone_number}_sent"
+
+    @staticmethod
+    def ip_key(ip, action):
+        return f"otp_ip_{ip}_{action}"
+
+    @staticmethod
+    def hash_code(phone_number, code):
+        return hmac.new(
+            SECRET_KEY.encode(), f"{phone_number}:{code}".encode(), hashlib.sha256
+        ).hexdigest()
+
+    @staticmethod
+    def generate_code():
+        """Generate a random 6-digit OTP."""
+        return str(secrets.randbelow(900000) + 100000)
+
+    @classmethod
+    def check_ip_limit(cls, ip, action, limit):
+        key = cls.ip_key(ip, action)
+        pipe = redis_client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, OTP_IP_WINDOW_SECONDS, nx=True)
+        count, _ = pipe.execute()
+        if count > limit:
+            raise OTPRateLimited("Too many requests. Please try again later.")
+
+    @classmethod
+    def create(cls, phone_number, ip):
+        """
+        Returns a new code for the phone number, replacing the previous one, raises OTPRateLimited.
+        """
+        cls.check_ip_limit(ip, "send", OTP_IP_SEND_LIMIT)
+        if not redis_client.set(
+            cls.sent_key(phone_number), 1, nx=True, ex=OTP_SEND_INTERVAL_SECONDS
+        ):
+            raise OTPRateLimited("OTP already sent. Please wait for a while.")
+        code = cls.generate_code()
+        key = cls.code_key(phone_number)
+        pipe = redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={"hash": cls.hash_code(phone_number, code), "attempts": 0})
+        pipe.expire(key, OTP_EXPIRY_AFTER_MINUTES * 60)
+        pipe.execute()
+        return code
+
+    @classmethod
+    def cancel(cls, phone_number):
+        """
+        Drop the code and the send interval, when the code could not be sent.
+        """
+        try:
+            redis_client.delete(cls.code_key(phone_number), cls.sent_key(phone_number))
+        except redis.RedisError as e:
+            # The send interval expires on its own
+            print(f"Failed to cancel the OTP of {phone_number}: {e}")
+
+    @classmethod
+    def verify(cls, phone_number, code, ip):
+        """
+        Checks and consumes the code of the phone number, raises InvalidOTP or OTPRateLimited.
+        """
+        cls.check_ip_limit(ip, "verify", OTP_IP_VERIFY_LIMIT)
+        result = VERIFY_SCRIPT(
+            keys=[cls.code_key(phone_number)],
+            args=[cls.hash_code(phone_number, code), OTP_MAX_ATTEMPTS],
+        )
+        if result == -1:
+            raise InvalidOTP("OTP has expired")
+        if result == -2:
+            raise InvalidOTP("Too many attempts. Please request a new OTP.")
+        if result != 1:
+            raise InvalidOTP("Invalid OTP")
@@ -0,0 +1,118 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _parse_list_param(request, name):
+    """
+    Returns the set of comma separated values of the query param, or None if it is not present.
+    """
+    if name not in request.query_params:
+        return None
+    values = request.query_params.get(name, "")
+    return {value.strip() for value in values.split(",") if value.strip()}
+
+
+def get_sparse_params(request):
+    """
+    Returns (fields, expand) requested by the client, each being None when not requested.
+    Only read requests can be trimmed, writes always use the full serializer.
+    """
+    if request is None or request.method != "GET":
+        return None, None
+    return (
+        _parse_list_param(request, FIELDS_PARAM),
+        _parse_list_param(request, EXPAND_PARAM),
+    )
+
+
+def is_expanded(name, expand, expandable_fields):
+    """
+    Nested fields are expanded unless the client sent ?expand= without them.
+    """
+    if name not in expandable_fields or expand is None:
+        return True
+    return name in expand
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin for the ?fields= and ?expand= query params.
+
+    ?fields=event_id,name only renders the given fields.
+    ?expand=layout renders the nested fields listed in Meta.expandable_fields
+    only when asked for, the others are rendered as primary keys.
+    Without these params the serializer renders as usual.
+    Only applies to the serializer which gets the request in its context,
+    i.e. the top level one created by the view.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = get_sparse_params(self.context.get("request"))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+        if expand is not None:
+            expandable_fields = getattr(self.Meta, "expandable_fields", [])
+            for name in expandable_fields:
+                if name in self.fields and name not in expand:
+                    self.fields[name] = self._get_collapsed_field(name, self.fields[name])
+
+    @staticmethod
+    def _get_collapsed_field(name, field):
+        kwargs = {"read_only": True}
+        if field.source != name:
+            kwargs["source"] = field.source
+        if isinstance(field, serializers.ListSerializer):
+            kwargs["many"] = True
+        return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsViewMixin:
+    """
+    Viewset mixin to only fetch the relations needed for the fields requested with ?fields= and ?expand=.
+
+    sparse_related_fields maps a serializer field to the lookups needed to render it expanded.
+    Lookups made only of forward foreign keys are joined with select_related,
+    the others are prefetched.
+    """
+
+    sparse_related_fields = {}
+
+    def get_sparse_queryset(self, queryset):
+        fields, expand = get_sparse_params(self.request)
+        serializer_class = self.get_serializer_class()
+        expandable_fields = getattr(serializer_class.Meta, "expandable_fields", [])
+        serializer_fields = serializer_class().fields
+        model = queryset.model
+        for name, lookups in self.sparse_related_fields.items():
+            if name not in serializer_fields:
+                continue
+            if fields is not None and name not in fields:
+                continue
+            if is_expanded(name, expand, expandable_fields):
+                for lookup in lookups:
+                    if _is_single_valued(model, lookup):
+                        queryset = queryset.select_related(lookup)
+                    else:
+                        queryset = queryset.prefetch_related(lookup)
+            elif not _is_single_valued(model, name):
+                # The primary keys of a to-many relation still need a query.
+                queryset = queryset.prefetch_related(name)
+        return queryset
+
+
+def _is_single_valued(model, lookup):
+    for part in lookup.split("__"):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            # Reverse relations without a related_name, e.g. venuelayoutsection_set
+            return False
+        if not field.is_relation or field.many_to_many or field.one_to_many:
+            return False
+        model = field.related_model
+    return True
@@ -0,0 +1,95 @@
+import time
+import uuid
+import redis
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from razexOne.redis import redis_client
+
+DURATIONS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def get_client_ip(request):
+    """
+    Client IP, the address seen by the last of the NUM_PROXIES proxies in front of the
+    server, or REMOTE_ADDR without proxies. The rest of X-Forwarded-For is set by the
+    client and is not trusted.
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def parse_rate(rate):
+    """
+    "<requests>/<s|m|h|d>" as in DEFAULT_THROTTLE_RATES, returns (requests, seconds).
+    """
+    requests, period = rate.split("/")
+    return int(requests), DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Limits the actions of a view listed in its throttle_scopes, e.g.
+    throttle_scopes = {"send_otp": [("otp_send", "ip"), ("otp_phone", "phone")]}
+    with the rate of each scope in DEFAULT_THROTTLE_RATES. Requests are counted by
+    user, by IP (see get_client_ip), by the phone_number of the request data, or by
+    phone_number and IP with phone_ip. Anonymous requests, and requests without a phone_number for the
+    phone scopes, are counted by IP.
+
+    Each counter is a Redis sorted set of the request times in the window, so the
+    limit applies to any window of that length, not to fixed periods. Requests are
+    allowed when Redis is not available.
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_key(self, request, key_type):
+        if key_type == "user" and request.user and request.user.is_authenticated:
+            return f"user_{request.user.pk}"
+        ip_key = f"ip_{get_client_ip(request)}"
+        if key_type in ("phone", "phone_ip"):
+            # The body may be a JSON array or scalar
+            data = request.data if isinstance(request.data, dict) else {}
+            phone_number = data.get("phone_number")
+            if not phone_number or not isinstance(phone_number, str):
+                return ip_key
+            phone_key = f"phone_{phone_number.strip()}"
+            return f"{phone_key}_{ip_key}" if key_type == "phone_ip" else phone_key
+        return ip_key
+
+    def allow_request(self, request, view):
+        scopes = getattr(view, "throttle_scopes", {}).get(getattr(view, "action", None), [])
+        for scope, key_type in scopes:
+            key = self.get_key(request, key_type)
+            requests, duration = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[scope])
+            try:
+                wait = self.hit(f"throttle_{scope}_{key}", requests, duration)
+            except redis.RedisError as e:
+                print(f"Failed to throttle {scope}: {e}")
+                continue
+            if wait is not None:
+                self.wait_seconds = wait
+                return False
+        return True
+
+    @staticmethod
+    def hit(key, requests, duration):
+        """
+        Counts a request, returns None if it is allowed or the seconds to wait.
+        """
+        now = time.time()
+        member = f"{now}_{uuid.uuid4().hex[:8]}"
+        pipe = redis_client.pipeline()
+        pipe.zremrangebyscore(key, 0, now - duration)
+        pipe.zadd(key, {member: now})
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.expire(key, duration)
+        _, _, count, oldest, _ = pipe.execute()
+        if count <= requests:
+            return None
+        # Rejected requests do not count, the client can retry once the oldest one leaves the window
+        redis_client.zrem(key, member)
+        return max(oldest[0][1] + duration - now, 0)
+
+    def wait(self):
+        return self.wait_seconds
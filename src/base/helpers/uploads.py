@@ -0,0 +1,184 @@
+import os
+import uuid
+from botocore.exceptions import BotoCoreError, ClientError
+from django.core import signing
+from django.db import models
+from rest_framework import serializers, exceptions
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
+from rest_framework.response import Response
+from drf_yasg.utils import swagger_auto_schema
+from razexOne.settings import (
+    PRESIGNED_UPLOAD_EXPIRY,
+    PRESIGNED_UPLOAD_TICKET_EXPIRY,
+    PRESIGNED_UPLOAD_MAX_SIZE,
+    PRESIGNED_UPLOAD_IMAGE_TYPES,
+    PRESIGNED_UPLOAD_FILE_TYPES,
+)
+
+TICKET_SALT = "presigned-upload"
+
+
+class PresignedUploadSerializer(serializers.Serializer):
+    field = serializers.CharField()
+    content_type = serializers.CharField()
+    file_name = serializers.CharField(max_length=255)
+
+
+class FinalizeUploadSerializer(serializers.Serializer):
+    ticket = serializers.CharField()
+
+
+def _get_file_field(instance, field_name, allowed_fields):
+    if field_name not in allowed_fields:
+        raise exceptions.ValidationError({"field": f"Must be one of {', '.join(allowed_fields)}"})
+    return instance._meta.get_field(field_name)
+
+
+def _get_content_types(field):
+    if isinstance(field, models.ImageField):
+        return PRESIGNED_UPLOAD_IMAGE_TYPES
+    return PRESIGNED_UPLOAD_FILE_TYPES
+
+
+def create_presigned_upload(instance, field_name, content_type, file_name, user, allowed_fields):
+    """
+    Returns a presigned POST to upload a file for a file field of the instance straight to S3,
+    and the ticket to give to finalize_presigned_upload once the upload is done.
+    The POST policy limits the size and the content type of the upload.
+    """
+    field = _get_file_field(instance, field_name, allowed_fields)
+    if content_type not in _get_content_types(field):
+        raise exceptions.ValidationError({"content_type": "File type is not allowed"})
+
+    storage = field.storage
+    _, extension = os.path.splitext(file_name)
+    name = field.generate_filename(instance, f"{uuid.uuid4().hex}{extension.lower()}")
+    conditions = [
+        {"Content-Type": content_type},
+        ["content-length-range", 1, PRESIGNED_UPLOAD_MAX_SIZE],
+    ]
+    fields = {"Content-Type": content_type}
+    if storage.default_acl:
+        conditions.append({"acl": storage.default_acl})
+        fields["acl"] = storage.default_acl
+    try:
+        post = storage.bucket.meta.client.generate_presigned_post(
+            Bucket=storage.bucket_name,
+            Key=storage._normalize_name(name),
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=PRESIGNED_UPLOAD_EXPIRY,
+        )
+    except (BotoCoreError, ClientError) as e:
+        print(f"Failed to presign the upload of {name}: {e}")
+        raise exceptions.APIException("Uploads are not available")
+
+    # Signed with its own salt, so that it can not be used as an auth token or the other way round
+    ticket = signing.dumps(
+        {
+            "model": instance._meta.label,
+            "pk": str(instance.pk),
+            "field": field_name,
+            "name": name,
+            "user_id": user.pk,
+        },
+        salt=TICKET_SALT,
+    )
+    return {"url": post["url"], "fields": post["fields"], "ticket": ticket}
+
+
+def finalize_presigned_upload(instance, ticket, user, allowed_fields):
+    """
+    Checks the upload of the ticket and attaches the uploaded object to the file field of the instance.
+    """
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=PRESIGNED_UPLOAD_TICKET_EXPIRY)
+    except signing.SignatureExpired:
+        raise exceptions.ValidationError({"ticket": "Ticket has expired"})
+    except signing.BadSignature:
+        raise exceptions.ValidationError({"ticket": "Invalid ticket"})
+    if (
+        data.get("model") != instance._meta.label
+        or data.get("pk") != str(instance.pk)
+        or data.get("user_id") != user.pk
+    ):
+        raise exceptions.ValidationError({"ticket": "Ticket is not for this object"})
+
+    field = _get_file_field(instance, data["field"], allowed_fields)
+    storage = field.storage
+    try:
+        head = storage.bucket.meta.client.head_object(
+            Bucket=storage.bucket_name, Key=storage._normalize_name(data["name"])
+        )
+    except ClientError:
+        raise exceptions.ValidationError({"ticket": "File has not been uploaded"})
+    except BotoCoreError as e:
+        print(f"Failed to check the upload of {data['name']}: {e}")
+        raise exceptions.APIException("Uploads are not available")
+    # Already enforced by the POST policy, checked again in case the object was replaced.
+    if head["ContentLength"] > PRESIGNED_UPLOAD_MAX_SIZE:
+        raise exceptions.ValidationError({"ticket": "File is too large"})
+    if head.get("ContentType") not in _get_content_types(field):
+        raise exceptions.ValidationError({"ticket": "File type is not allowed"})
+
+    setattr(instance, field.name, data["name"])
+    update_fields = [field.name]
+    if hasattr(instance, "updated_at"):
+        update_fields.append("updated_at")
+    instance.save(update_fields=update_fields)
+    return instance
+
+
+UPLOAD_PARSER_CLASSES = [JSONParser, FormParser, MultiPartParser]
+
+
+class PresignedUploadMixin:
+    """
+    Adds upload_url and finalize_upload actions to a ModelViewSet, for the file
+    fields listed in presigned_upload_fields, so that clients upload the files
+    straight to S3 instead of through the API.
+
+    1. POST {id}/upload_url/ with the field, content_type and file_name
+    2. POST the file to the returned url with the returned fields
+    3. POST {id}/finalize_upload/ with the ticket
+    """
+
+    presigned_upload_fields = []
+
+    def check_upload_allowed(self, instance):
+        """
+        Override to forbid uploads for some objects, raise a DRF exception.
+        """
+
+    @swagger_auto_schema(method="post", request_body=PresignedUploadSerializer)
+    @action(detail=True, methods=["post"], parser_classes=UPLOAD_PARSER_CLASSES)
+    def upload_url(self, request, pk=None):
+        serializer = PresignedUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        instance = self.get_object()
+        self.check_upload_allowed(instance)
+        upload = create_presigned_upload(
+            instance,
+            serializer.validated_data["field"],
+            serializer.validated_data["content_type"],
+            serializer.validated_data["file_name"],
+            request.user,
+            self.presigned_upload_fields,
+        )
+        return Response(upload)
+
+    @swagger_auto_schema(method="post", request_body=FinalizeUploadSerializer)
+    @action(detail=True, methods=["post"], parser_classes=UPLOAD_PARSER_CLASSES)
+    def finalize_upload(self, request, pk=None):
+        serializer = FinalizeUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        instance = self.get_object()
+        self.check_upload_allowed(instance)
+        instance = finalize_presigned_upload(
+            instance,
+            serializer.validated_data["ticket"],
+            request.user,
+            self.presigned_upload_fields,
+        )
+        return Response(self.get_serializer(instance).data)
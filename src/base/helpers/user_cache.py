@@ -0,0 +1,68 @@
+import copy
+import threading
+from cachetools import TTLCache
+from django.core.cache import cache
+from django.db import transaction
+from razexOne.settings import (
+    USER_CACHE_TIMEOUT,
+    USER_CACHE_LOCAL_TTL,
+    USER_CACHE_LOCAL_SIZE,
+)
+
+
+class UserCache:
+    """
+    Users of the authenticated requests by (auth_backend, uid), so that the
+    authentication backends do not query the user on every request.
+
+    A per process TTL cache sits in front of the shared Django cache. Saving or
+    deleting a user drops both in the current process, other processes may keep
+    serving the previous version for up to USER_CACHE_LOCAL_TTL seconds.
+    Every lookup returns its own copy, so requests can modify the user freely.
+    """
+
+    def __init__(self):
+        self.local = TTLCache(maxsize=USER_CACHE_LOCAL_SIZE, ttl=USER_CACHE_LOCAL_TTL)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Singleton pattern to get the UserCache instance.
+        """
+        if not hasattr(cls, "instance"):
+            cls.instance = cls()
+        return cls.instance
+
+    @staticmethod
+    def cache_key(auth_backend, uid):
+        return f"user_{auth_backend}_{uid}"
+
+    def get(self, uid, auth_backend, fetch):
+        """
+        Returns the cached user, or the one returned by fetch, which may raise User.DoesNotExist.
+        """
+        key = self.cache_key(auth_backend, uid)
+        with self.lock:
+            user = self.local.get(key)
+        if user is None:
+            user = cache.get(key)
+            if user is None:
+                user = fetch()
+                cache.set(key, user, timeout=USER_CACHE_TIMEOUT)
+            with self.lock:
+                self.local[key] = user
+        return copy.copy(user)
+
+    def invalidate(self, auth_backend, uid):
+        key = self.cache_key(auth_backend, uid)
+        with self.lock:
+            self.local.pop(key, None)
+        # Again after the commit, in case another request cached the previous version meanwhile
+        cache.delete(key)
+        transaction.on_commit(lambda: self._drop(key))
+
+    def _drop(self, key):
+        with self.lock:
+            self.local.pop(key, None)
+        cache.delete(key)
@@ -0,0 +1,80 @@
+import datetime
+import time
+import jwt as pyjwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.core.management.base import BaseCommand
+from google.auth import jwt as google_jwt
+from base.helpers.firebase import FirebaseTokenVerifier, ISSUER_PREFIX
+
+PROJECT_ID = "bench-project"
+KEY_ID = "bench-key"
+
+
+def _create_certificate():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "bench")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class Command(BaseCommand):
+    help = "Measure the cost of verifying a Firebase ID token, uncached and cached, with a local key"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def _measure(self, label, verify, token, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            verify(token)
+        per_call = (time.perf_counter() - start) / iterations * 1e6
+        self.stdout.write(f"{label:<50} {per_call:10.1f} us/request")
+        return per_call
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        key, certificate = _create_certificate()
+        now = int(time.time())
+        token = pyjwt.encode(
+            {
+                "iss": f"{ISSUER_PREFIX}{PROJECT_ID}",
+                "aud": PROJECT_ID,
+                "sub": "bench-user",
+                "iat": now,
+                "auth_time": now,
+                "exp": now + 3600,
+            },
+            key,
+            algorithm="RS256",
+            headers={"kid": KEY_ID},
+        )
+
+        verifier = FirebaseTokenVerifier(project_id=PROJECT_ID)
+        public_key = x509.load_pem_x509_certificate(certificate.encode()).public_key()
+        verifier.public_keys = {KEY_ID: public_key}
+        # Avoid fetching the real certificates
+        verifier.refresher_started = True
+
+        # What firebase_admin does once the certificates are fetched: parse them and verify.
+        before = self._measure(
+            "firebase_admin path (google.auth.jwt.decode)",
+            lambda t: google_jwt.decode(t, certs={KEY_ID: certificate}, audience=PROJECT_ID),
+            token,
+            iterations,
+        )
+        self._measure("FirebaseTokenVerifier, parsed keys, no cache", verifier.verify_signature, token, iterations)
+        after = self._measure("FirebaseTokenVerifier, cached token", verifier.verify, token, iterations)
+        self.stdout.write(self.style.SUCCESS(f"Cached verification is {before / after:.0f}x faster."))
@@ -0,0 +1,62 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+
+# MIDDLEWARE before SplitStackMiddleware
+FULL_STACK = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+
+def _view(request):
+    return HttpResponse("{}", content_type="application/json")
+
+
+def _build_chain(middleware):
+    chain = _view
+    for path in reversed(middleware):
+        chain = import_string(path)(chain)
+    return chain
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request cost of the middleware stack, before and with SplitStackMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000)
+
+    def _measure(self, label, chain, request_factory, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            chain(request_factory())
+        per_call = (time.perf_counter() - start) / iterations * 1e6
+        self.stdout.write(f"{label:<50} {per_call:10.1f} us/request")
+        return per_call
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        factory = RequestFactory()
+        requests = {
+            "token": lambda: factory.get("/api/events/", HTTP_JWT="token"),
+            "no token": lambda: factory.get("/api/events/"),
+        }
+        full_stack = _build_chain(FULL_STACK)
+        split_stack = _build_chain(settings.MIDDLEWARE)
+        # Nothing is measured for the view itself, time it alone to subtract it
+        baseline = self._measure("view only", _view, requests["token"], iterations)
+        for name, request_factory in requests.items():
+            before = self._measure(f"full stack, {name}", full_stack, request_factory, iterations)
+            after = self._measure(f"split stack, {name}", split_stack, request_factory, iterations)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: middleware overhead {before - baseline:.1f} -> {after - baseline:.1f} us/request"
+                )
+            )
@@ -0,0 +1,74 @@
+import signal
+import threading
+import time
+import uuid
+import redis
+from django.core.management.base import BaseCommand
+from razexOne.settings import SMS_PROVIDER, SMS_PROVIDERS
+from razexOne.sms import SMSQueue
+
+
+class Command(BaseCommand):
+    help = "Send the queued SMS, with as many threads as the concurrency of the provider"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", type=str, default=SMS_PROVIDER, choices=list(SMS_PROVIDERS))
+        parser.add_argument("--once", action="store_true", help="Send the queued SMS and exit")
+
+    def _work(self, provider, worker_id, stop, once):
+        while not stop.is_set():
+            try:
+                job, item = SMSQueue.pop(worker_id, timeout=1)
+            except redis.RedisError as e:
+                print(f"Failed to read the SMS queue: {e}")
+                time.sleep(1)
+                continue
+            if job is None:
+                if once:
+                    return
+                continue
+            try:
+                SMSQueue.process(provider, job, worker_id, item)
+            except redis.RedisError as e:
+                # Only the retry schedule, the job stays in the processing list for a later send
+                print(f"Failed to schedule the retry of SMS {job['id']}: {e}")
+
+    def handle(self, *args, **options):
+        provider = SMSQueue.get_provider(options["provider"])
+        concurrency = SMS_PROVIDERS[options["provider"]]["concurrency"]
+        worker_id = uuid.uuid4().hex
+        SMSQueue.heartbeat(worker_id)
+        SMSQueue.recover()
+        stop = threading.Event()
+        # docker stop sends SIGTERM, the threads finish their current send before exiting
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stop.set())
+        threads = [
+            threading.Thread(target=self._work, args=(provider, worker_id, stop, options["once"]))
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Sending SMS with {options['provider']}, {concurrency} threads.")
+        while not stop.is_set() and any(thread.is_alive() for thread in threads):
+            try:
+                SMSQueue.heartbeat(worker_id)
+                SMSQueue.recover()
+                SMSQueue.promote_retries()
+            except redis.RedisError as e:
+                print(f"Failed to maintain the SMS queue: {e}")
+            stop.wait(1)
+        for thread in threads:
+            thread.join()
+        try:
+            SMSQueue.release(worker_id)
+        except redis.RedisError as e:
+            # Recovered by the other workers once the heartbeat expires
+            print(f"Failed to release the SMS of worker {worker_id}: {e}")
+        metrics = SMSQueue.get_metrics()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {metrics['sent']}, retried {metrics['retried']}, failed {metrics['failed']}, "
+                f"expired {metrics['expired']}, {metrics['queued']} queued."
+            )
+        )
@@ -18,6 +18,7 @@ from razexOne.storages import PublicMediaStorage
 from django.utils.timezone import now
 import random
 from .helpers.phone_number import validate_phone_number
+from .helpers.user_cache import UserCache
 
 
 class UserManager(BaseUserManager):
@@ -28,9 +29,7 @@ class UserManager(BaseUserManager):
             raise ValueError("Invalid auth backend")
 
         user = self.create(uid=uid, auth_backend=auth_backend, **extra_fields)
-        user.save()
-        # Create wallet for the user
-        _ = Wallet.get_wallet_for_user(user)
+        # The wallet is created on first use, see Wallet.get_wallet_for_user
         return user
 
     def create_superuser(self, user_id, uid, auth_backend, **extra_fields):
@@ -52,7 +51,10 @@ class UserManager(BaseUserManager):
             return self.create_user(uid=uid, auth_backend=auth_backend, **extra_fields)
 
     def get_user(self, uid: str, auth_backend: str) -> "User":
-        return self.get(uid=uid, auth_backend=auth_backend)
+        # Cached, see UserCache
+        return UserCache.get_instance().get(
+            uid, auth_backend, lambda: self.get(uid=uid, auth_backend=auth_backend)
+        )
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -86,6 +88,9 @@ class User(AbstractBaseUser, PermissionsMixin):
         null=True,
         verbose_name="Profile picture",
     )
+    profile_picture_variants = models.JSONField(
+        default=dict, blank=True, editable=False, verbose_name="Profile picture variants"
+    )
     password = models.CharField(max_length=128, blank=True, null=True)  # For admin login
     allow_app_notification = models.BooleanField(
         default=True, verbose_name="Allow app notifications"
@@ -223,6 +228,10 @@ import random
 
 
 class OTP(models.Model):
+    """
+    OTPs sent before they moved to Redis, see base.helpers.otp_store.OTPStore.
+    """
+
     phone_number = models.CharField(
         max_length=15,
         validators=[validate_phone_number],
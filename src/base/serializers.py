@@ -2,11 +2,16 @@ from rest_framework import serializers
 from base.models import User, Wallet, WalletTransaction, OTP
 from .auth import NativeAuthentication
 from .helpers.phone_number import validate_phone_number
+from .helpers.sparse_fields import SparseFieldsMixin
+from .helpers.images import ImageVariantsField
+from razexOne.settings import BATCH_MAX_REQUESTS
 
 
 class UserDetailSerializer(serializers.ModelSerializer):
     """Serializer for retrieving self-account details"""
 
+    profile_picture_variants = ImageVariantsField("profile_picture")
+
     class Meta:
         model = User
         fields = [
@@ -18,6 +23,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
             "birthdate",
             "is_onboarded",
             "profile_picture",
+            "profile_picture_variants",
             "is_email_verified",
             "allow_app_notification",
         ]
@@ -26,6 +32,8 @@ class UserDetailSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     "User serializer for admin view"
 
+    profile_picture_variants = ImageVariantsField("profile_picture")
+
     class Meta:
         model = User
         fields = "__all__"
@@ -43,13 +51,14 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         fields = ["name", "birthdate", "email", "profile_picture", "allow_app_notification"]
 
 
-class WalletSerializer(serializers.ModelSerializer):
+class WalletSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
     class Meta:
         model = Wallet
         fields = ["wallet_id", "user", "balance", "can_receive_payments"]
         read_only_fields = ["wallet_id", "balance"]
+        expandable_fields = ["user"]
 
 
 class WalletTransactionSerializer(serializers.ModelSerializer):
@@ -95,3 +104,21 @@ class OTPSerializer(serializers.Serializer):
         if not value.isdigit() or len(value) != 6:
             raise serializers.ValidationError("OTP must be a 6-digit number")
         return value
+
+
+class BatchCallSerializer(serializers.Serializer):
+    """
+    One sub-request of a batch, only reads are allowed since they run in parallel
+    """
+
+    method = serializers.ChoiceField(choices=["GET"], default="GET")
+    path = serializers.CharField(max_length=2000)
+
+    def validate_path(self, value):
+        if not value.startswith("/api/"):
+            raise serializers.ValidationError("Only /api/ paths can be batched")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchCallSerializer(many=True, allow_empty=False, max_length=BATCH_MAX_REQUESTS)
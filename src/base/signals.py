@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from base.models import User
+from base.helpers.images import schedule_image_variants
+from base.helpers.user_cache import UserCache
+
+
+@receiver(post_save, sender=User)
+def update_profile_picture_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "profile_picture" not in update_fields:
+        return
+    schedule_image_variants(instance, "profile_picture")
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    UserCache.get_instance().invalidate(instance.auth_backend, instance.uid)
@@ -5,10 +5,12 @@ from base.views import (
     UserAdminViewSet,
     RootView,
     HealthCheckView,
+    SMSMetricsView,
     WalletTransactionViewSet,
     WalletAdminViewSet,
     OTPViewSet,
     AdminOTPViewSet,
+    BatchView,
 )
 
 
@@ -29,4 +31,6 @@ router.register(r"admin/otp", AdminOTPViewSet, basename="otp-admin")
 urlpatterns = [
     path("", RootView.as_view(), name="root"),
     path("healthz/", HealthCheckView.as_view(), name="health-check"),
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("admin/sms/metrics/", SMSMetricsView.as_view(), name="sms-metrics"),
 ] + router.urls
@@ -1,4 +1,5 @@
 from .user import UserViewSet, UserAdminViewSet
-from .service import HealthCheckView, RootView, custom_404_handler
+from .service import HealthCheckView, RootView, SMSMetricsView, custom_404_handler
+from .batch import BatchView
 from .wallet import WalletTransactionViewSet, WalletAdminViewSet
 from .otp import OTPViewSet, AdminOTPViewSet
@@ -0,0 +1,115 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.db import connections
+from django.http import HttpRequest, QueryDict, Http404
+from django.urls import resolve
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from base.serializers import BatchSerializer
+from razexOne.settings import BATCH_MAX_WORKERS
+
+
+class BatchView(APIView):
+    """
+    Runs several GET requests of the API in one call.
+
+    The caller is authenticated once and every sub-request is dispatched straight
+    to its view as that user, skipping the middlewares and the authentication backends.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=BatchSerializer,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "responses": openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                "path": openapi.Schema(type=openapi.TYPE_STRING),
+                                "status": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                "body": openapi.Schema(type=openapi.TYPE_OBJECT),
+                            },
+                        ),
+                    )
+                },
+            )
+        },
+        operation_summary="Run several GET requests in one call.",
+        operation_description="""
+        Each request is a path of the API, with its query string, e.g. /api/users/me/.
+        The responses are returned in the same order with their own status,
+        a failing request does not fail the batch.
+        """,
+    )
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        calls = serializer.validated_data["requests"]
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(calls))) as executor:
+            responses = list(
+                executor.map(lambda call: self.run_call(request, call), calls)
+            )
+        return Response({"responses": responses})
+
+    def run_call(self, request, call):
+        try:
+            status, body = self.dispatch_call(request, call)
+        except Exception as e:
+            print(f"Batch request {call['path']} failed: {e}")
+            status, body = 500, {"detail": "Internal server error."}
+        finally:
+            # Connections are per thread and the pool threads are discarded.
+            connections.close_all()
+        return {"path": call["path"], "status": status, "body": body}
+
+    def dispatch_call(self, request, call):
+        url = urlsplit(call["path"])
+        try:
+            match = resolve(url.path)
+        except Http404:
+            return 404, {"detail": "Not found."}
+        if getattr(match.func, "view_class", None) is BatchView:
+            return 400, {"detail": "Batches cannot be nested."}
+
+        sub_request = self.build_request(request, call["method"], url)
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        if response.streaming:
+            # Like the exports, their content is only produced while the stream is read
+            response.close()
+            return 400, {"detail": "Streaming endpoints cannot be batched."}
+        if hasattr(response, "data"):
+            return response.status_code, response.data
+        # Plain Django response
+        content = response.content.decode() if response.content else None
+        if content and response.get("Content-Type", "").startswith("application/json"):
+            content = json.loads(content)
+        return response.status_code, content
+
+    @staticmethod
+    def build_request(request, method, url):
+        sub_request = HttpRequest()
+        sub_request.method = method
+        sub_request.path = sub_request.path_info = url.path
+        sub_request.GET = QueryDict(url.query)
+        # Host and scheme for the absolute urls built by the serializers
+        sub_request.META = {
+            key: value
+            for key, value in request._request.META.items()
+            if key.startswith(("HTTP_", "SERVER_", "REMOTE_")) or key == "wsgi.url_scheme"
+        }
+        sub_request.META.update(
+            REQUEST_METHOD=method, PATH_INFO=url.path, QUERY_STRING=url.query
+        )
+        # Picked up by DRF instead of running the authentication backends again
+        sub_request._force_auth_user = request.user
+        sub_request.user = request.user
+        return sub_request
@@ -11,9 +11,12 @@ from drf_yasg.utils import swagger_auto_schema
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny
 from razexOne.settings import OTP_EXPIRY_AFTER_MINUTES, DEBUG
-from razexOne.sns import SNSService
+from razexOne.sms import SMSQueue
 from base.auth import OTPAuthentication
 from base.helpers.phone_number import validate_phone_number
+from base.helpers.otp_store import OTPStore, OTPRateLimited, InvalidOTP
+from base.helpers.throttling import get_client_ip
+import redis
 
 
 class AdminOTPViewSet(viewsets.ModelViewSet):
@@ -40,6 +43,10 @@ class OTPViewSet(viewsets.GenericViewSet):
 
     permission_classes = [AllowAny]
     serializer_class = OTPSerializer
+    throttle_scopes = {
+        "send_otp": [("otp_send", "ip")],
+        "verify_otp": [("otp_verify", "phone_ip"), ("otp_verify_phone", "phone")],
+    }
 
     @swagger_auto_schema(
         method="post",
@@ -74,28 +81,37 @@ class OTPViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        otp = OTP.get_or_create_otp(phone_number)
+        try:
+            validate_phone_number(phone_number)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not otp.can_send():
+        try:
+            otp = OTPStore.create(phone_number, get_client_ip(request))
+        except OTPRateLimited as e:
             return Response(
-                {"error": "OTP already sent. Please wait for a while."},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        except redis.RedisError as e:
+            print(f"Failed to create the OTP of {phone_number}: {e}")
+            return Response(
+                {"error": "OTP service is not available"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        sns = SNSService.get_instance()
         try:
-            sns.send_otp(phone_number, otp.otp, OTP_EXPIRY_AFTER_MINUTES)
-            otp.mark_sent()
-        except sns.client.exceptions.InvalidParameterValue as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
+            SMSQueue.enqueue_otp(phone_number, otp, OTP_EXPIRY_AFTER_MINUTES)
+        except redis.RedisError as e:
+            print(f"Failed to queue the OTP of {phone_number}: {e}")
+            OTPStore.cancel(phone_number)
             return Response(
-                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"error": "OTP service is not available"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
         resp = {"message": "OTP sent successfully"}
         if DEBUG:
-            resp["otp"] = otp.otp
+            resp["otp"] = otp
         return Response(resp, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
@@ -140,17 +156,19 @@ class OTPViewSet(viewsets.GenericViewSet):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            otp = OTP.objects.get(phone_number=phone_number, otp=otp_code)
-            if not otp.is_valid():
-                return Response(
-                    {"error": "OTP has expired"}, status=status.HTTP_400_BAD_REQUEST
-                )
-            # delete the otp instance so that it can't be used again
-            otp.delete()
-            # Generate JWT token for this phone number
-            jwt_token = OTPAuthentication().generate_jwt_token(phone_number)
-            return Response({"Jwt": jwt_token}, status=status.HTTP_200_OK)
-        except OTP.DoesNotExist:
+            OTPStore.verify(phone_number, str(otp_code), get_client_ip(request))
+        except InvalidOTP as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except OTPRateLimited as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        except redis.RedisError as e:
+            print(f"Failed to verify the OTP of {phone_number}: {e}")
             return Response(
-                {"error": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST
+                {"error": "OTP service is not available"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
+        # Generate JWT token for this phone number
+        jwt_token = OTPAuthentication().generate_jwt_token(phone_number)
+        return Response({"Jwt": jwt_token}, status=status.HTTP_200_OK)
@@ -4,6 +4,9 @@ from rest_framework import status
 from razexOne.settings import DEBUG
 from django.shortcuts import redirect
 from django.db import connection
+from base.helpers.api_permissions import AdminPermission
+from razexOne.sms import SMSQueue
+import redis
 
 
 class HealthCheckView(APIView):
@@ -63,3 +66,17 @@ def custom_404_handler(request, exception=None):
         {"detail": "Not Found"},
         status=status.HTTP_404_NOT_FOUND,
     )
+
+
+class SMSMetricsView(APIView):
+    """
+    Depth of the SMS queue, outcome counters and latency histograms of the SMS workers.
+    """
+
+    permission_classes = [AdminPermission]
+
+    def get(self, request):
+        try:
+            return Response(SMSQueue.get_metrics())
+        except redis.RedisError as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
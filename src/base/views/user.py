@@ -8,6 +8,13 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from base.auth import AuthManager
 from rest_framework.parsers import FormParser, MultiPartParser
+from base.helpers.uploads import (
+    PresignedUploadSerializer,
+    FinalizeUploadSerializer,
+    UPLOAD_PARSER_CLASSES,
+    create_presigned_upload,
+    finalize_presigned_upload,
+)
 
 
 class UserViewSet(viewsets.GenericViewSet):
@@ -37,6 +44,33 @@ class UserViewSet(viewsets.GenericViewSet):
         serializer.save()
         return Response(serializer.data)
 
+    @swagger_auto_schema(method="post", request_body=PresignedUploadSerializer)
+    @action(detail=False, methods=["post"], parser_classes=UPLOAD_PARSER_CLASSES)
+    def upload_url(self, request):
+        """Presigned POST to upload the logged-in user's profile picture straight to S3"""
+        serializer = PresignedUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = create_presigned_upload(
+            request.user,
+            serializer.validated_data["field"],
+            serializer.validated_data["content_type"],
+            serializer.validated_data["file_name"],
+            request.user,
+            ["profile_picture"],
+        )
+        return Response(upload)
+
+    @swagger_auto_schema(method="post", request_body=FinalizeUploadSerializer)
+    @action(detail=False, methods=["post"], parser_classes=UPLOAD_PARSER_CLASSES)
+    def finalize_upload(self, request):
+        """Attach the profile picture uploaded with upload_url"""
+        serializer = FinalizeUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = finalize_presigned_upload(
+            request.user, serializer.validated_data["ticket"], request.user, ["profile_picture"]
+        )
+        return Response(UserDetailSerializer(user).data)
+
     @swagger_auto_schema(
         method="get",
         responses={200: WalletSerializer()},
@@ -45,7 +79,8 @@ class UserViewSet(viewsets.GenericViewSet):
     def my_wallet(self, request):
         """Get the logged-in user's wallet"""
         wallet = Wallet.get_wallet_for_user(request.user)
-        serializer = WalletSerializer(wallet)
+        wallet.user = request.user  # Already loaded, avoid fetching it again.
+        serializer = WalletSerializer(wallet, context={"request": request})
         return Response(serializer.data)
 
 
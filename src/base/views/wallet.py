@@ -12,6 +12,7 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from django_filters.rest_framework import DjangoFilterBackend
 from base.filters.wallet import WalletTransactionFilter
+from base.helpers.sparse_fields import SparseFieldsViewMixin
 
 
 class WalletTransactionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -63,11 +64,20 @@ class WalletTransactionViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class WalletAdminViewSet(viewsets.ModelViewSet):
+class WalletAdminViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    Use ?fields= to only get some of the fields and ?expand= to choose
+    if the user is expanded or returned as an id.
+    """
+
     permission_classes = [AdminPermission]
 
     queryset = Wallet.objects.all()
     serializer_class = WalletSerializer
+    sparse_related_fields = {"user": ["user"]}
+
+    def get_queryset(self):
+        return self.get_sparse_queryset(super().get_queryset())
 
     def get_serializer_class(self):
         if self.action == "update" or self.action == "partial_update":
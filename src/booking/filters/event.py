@@ -1,5 +1,6 @@
 import django_filters
-from booking.models import Event, EventCategory, Subcategory
+from django import forms
+from booking.models import Event, EventCard, EventCategory, Subcategory
 
 
 class EventFilter(django_filters.FilterSet):
@@ -12,6 +13,9 @@ class EventFilter(django_filters.FilterSet):
     end_date__gte = django_filters.DateFilter(field_name="end_date", lookup_expr="gte")
     end_date__lte = django_filters.DateFilter(field_name="end_date", lookup_expr="lte")
     on_date = django_filters.DateFilter(method="filter_on_date")
+    # Events having a product in the price range
+    price__gte = django_filters.NumberFilter(field_name="price_end", lookup_expr="gte")
+    price__lte = django_filters.NumberFilter(field_name="price_start", lookup_expr="lte")
 
     categories = django_filters.ModelMultipleChoiceFilter(
         queryset=EventCategory.objects.all(),
@@ -47,3 +51,56 @@ class EventFilter(django_filters.FilterSet):
     class Meta:
         model = Event
         fields = ["cities", "categories", "is_featured", "artists", "subcategories"]
+
+
+class IdListField(forms.TypedMultipleChoiceField):
+    """
+    Repeated integer query params, e.g. ?cities=1&cities=2, without checking them against the database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("coerce", int)
+        super().__init__(*args, **kwargs)
+
+    def valid_value(self, value):
+        return True
+
+
+class IdListFilter(django_filters.MultipleChoiceFilter):
+    field_class = IdListField
+
+
+class EventCardFilter(django_filters.FilterSet):
+    """
+    Same params as EventFilter, on the EventCard read model.
+    """
+
+    start_date__gte = django_filters.DateFilter(
+        field_name="start_date", lookup_expr="gte"
+    )
+    start_date__lte = django_filters.DateFilter(
+        field_name="start_date", lookup_expr="lte"
+    )
+    end_date__gte = django_filters.DateFilter(field_name="end_date", lookup_expr="gte")
+    end_date__lte = django_filters.DateFilter(field_name="end_date", lookup_expr="lte")
+    on_date = django_filters.DateFilter(method="filter_on_date")
+    price__gte = django_filters.NumberFilter(field_name="max_price", lookup_expr="gte")
+    price__lte = django_filters.NumberFilter(field_name="min_price", lookup_expr="lte")
+
+    # OR filtering, e.g. events in any of the selected cities
+    categories = IdListFilter(field_name="category_ids", method="filter_ids")
+    subcategories = IdListFilter(field_name="subcategory_ids", method="filter_ids")
+    cities = IdListFilter(field_name="city_ids", method="filter_ids")
+    artists = IdListFilter(field_name="artist_ids", method="filter_ids")
+
+    def filter_on_date(self, queryset, name, value):
+        return queryset.filter(start_date__lte=value, end_date__gte=value)
+
+    def filter_ids(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter_ids(name, value)
+
+    class Meta:
+        model = EventCard
+        fields = ["is_featured"]
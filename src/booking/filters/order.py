@@ -0,0 +1,50 @@
+import django_filters
+from booking.models import Order, Ticket
+
+
+class OrderFilter(django_filters.FilterSet):
+    timestamp__gte = django_filters.DateFilter(
+        field_name="timestamp", lookup_expr="gte"
+    )  # Greater than
+    timestamp__lte = django_filters.DateFilter(
+        field_name="timestamp", lookup_expr="lte"
+    )  # Less than
+
+    event = django_filters.UUIDFilter(field_name="product__event")
+
+    class Meta:
+        model = Order
+        fields = [
+            "event",
+            "product",
+            "status",
+            "type",
+            "user",
+            "timestamp__gte",
+            "timestamp__lte",
+        ]
+
+
+class TicketFilter(django_filters.FilterSet):
+    # Tickets do not have a timestamp of their own, filter on the order date.
+    timestamp__gte = django_filters.DateFilter(
+        field_name="order__timestamp", lookup_expr="gte"
+    )
+    timestamp__lte = django_filters.DateFilter(
+        field_name="order__timestamp", lookup_expr="lte"
+    )
+
+    event = django_filters.UUIDFilter(field_name="product__event")
+    status = django_filters.CharFilter(field_name="order__status")
+
+    class Meta:
+        model = Ticket
+        fields = [
+            "event",
+            "product",
+            "status",
+            "is_cancelled",
+            "user",
+            "timestamp__gte",
+            "timestamp__lte",
+        ]
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from base.models import User
+from base.helpers.images import refresh_image_variants
+from booking.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Generate the missing or outdated variants of the uploaded images"
+
+    def handle(self, *args, **options):
+        fields = dict(IMAGE_FIELDS)
+        fields[User] = "profile_picture"
+        for model, field_name in fields.items():
+            instances = model.objects.exclude(**{field_name: ""}).exclude(
+                **{f"{field_name}__isnull": True}
+            )
+            for instance in instances.iterator():
+                refresh_image_variants(instance, field_name)
+            self.stdout.write(f"Checked {model.__name__}.{field_name}")
+        self.stdout.write(self.style.SUCCESS("Image variants are up to date."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from booking.models import VenueLayout
+from booking.services.venue_tiles import VenueTileService
+
+
+class Command(BaseCommand):
+    help = "Generate the missing or outdated tiles of the venue layout images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--layout", type=int, help="Only this layout")
+        parser.add_argument(
+            "--force", action="store_true", help="Regenerate even if the image did not change"
+        )
+
+    def handle(self, *args, **options):
+        layouts = VenueLayout.objects.all()
+        if options["layout"]:
+            layouts = layouts.filter(layout_id=options["layout"])
+        count = 0
+        for layout in layouts:
+            if options["force"] and layout.tile_manifest:
+                # Keep the old manifest around so that its tiles are deleted
+                layout.tile_manifest["source"] = None
+            if VenueTileService.refresh(layout):
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated the tiles of {count} layouts."))
@@ -0,0 +1,40 @@
+import signal
+import threading
+import time
+import redis
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from base.helpers.images import pop_image_variants, refresh_image_variants
+
+
+class Command(BaseCommand):
+    help = "Generate the variants of the images queued by the uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Generate the queued variants and exit")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        # Images uploaded while the worker was not running, or whose job was lost
+        call_command("generate_image_variants", stdout=self.stdout)
+        self.stdout.write("Waiting for image uploads.")
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    job = pop_image_variants(timeout=1)
+                except redis.RedisError as e:
+                    print(f"Failed to read the image variants queue: {e}")
+                    time.sleep(1)
+                    continue
+                if job is None:
+                    if options["once"]:
+                        break
+                    continue
+                instance, field_name = job
+                if instance is not None:
+                    refresh_image_variants(instance, field_name)
+        except KeyboardInterrupt:
+            pass
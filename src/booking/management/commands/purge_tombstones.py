@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from booking.services.catalog_sync import CatalogSyncService
+
+
+class Command(BaseCommand):
+    help = "Delete the catalog tombstones older than DELTA_SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        count, _ = CatalogSyncService.purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} tombstones."))
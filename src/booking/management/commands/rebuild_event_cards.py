@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from booking.models import Event, EventCard
+from booking.services.event_card import EventCardService
+from booking.services.event_aggregates import EventAggregatesService
+
+
+class Command(BaseCommand):
+    help = "Recompute the event price and availability aggregates and rebuild the event cards"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", type=str, help="Only rebuild the card of this event")
+
+    def handle(self, *args, **options):
+        if options["event"]:
+            event_ids = [options["event"]]
+        else:
+            event_ids = list(Event.objects.values_list("event_id", flat=True))
+            # Cards of deleted events are removed by the cascade, this is just in case.
+            EventCard.objects.exclude(event_id__in=event_ids).delete()
+
+        for event_id in event_ids:
+            # Refreshes the card when an aggregate changed
+            if not EventAggregatesService.refresh(event_id):
+                EventCardService.refresh(event_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(event_ids)} event cards."))
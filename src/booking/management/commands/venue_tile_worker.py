@@ -0,0 +1,43 @@
+import signal
+import threading
+import time
+import redis
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from booking.models import VenueLayout
+from booking.services.venue_tiles import VenueTileService
+
+
+class Command(BaseCommand):
+    help = "Generate the tiles of the venue layouts queued by the uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Generate the queued tiles and exit")
+
+    def _refresh(self, layout_id):
+        close_old_connections()
+        layout = VenueLayout.objects.filter(layout_id=layout_id).first()
+        if layout is not None and VenueTileService.refresh(layout):
+            self.stdout.write(f"Generated the tiles of layout {layout_id}.")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        # Layouts uploaded while the worker was not running, or whose job was lost
+        for layout_id in VenueLayout.objects.values_list("layout_id", flat=True):
+            self._refresh(layout_id)
+        self.stdout.write("Waiting for venue layout uploads.")
+        try:
+            while not stop.is_set():
+                try:
+                    layout_id = VenueTileService.pop(timeout=1)
+                except redis.RedisError as e:
+                    print(f"Failed to read the venue tiles queue: {e}")
+                    time.sleep(1)
+                    continue
+                if layout_id is not None:
+                    self._refresh(layout_id)
+                elif options["once"]:
+                    break
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ID_LIST_COLUMNS = ["city_ids", "category_ids", "subcategory_ids", "artist_ids"]
+
+
+def create_gin_indexes(apps, schema_editor):
+    # jsonb containment indexes for the id list filters, only available on postgres.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in ID_LIST_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "booking_eventcard_{column}_gin" '
+            f'ON "booking_eventcard" USING gin ("{column}" jsonb_path_ops)'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in ID_LIST_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "booking_eventcard_{column}_gin"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0032_alter_event_options_alter_eventcategory_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCard',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='booking.event')),
+                ('listing', models.JSONField(default=dict)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('sale_start', models.DateTimeField(blank=True, null=True)),
+                ('sale_end', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('city_ids', models.JSONField(default=list)),
+                ('category_ids', models.JSONField(default=list)),
+                ('subcategory_ids', models.JSONField(default=list)),
+                ('artist_ids', models.JSONField(default=list)),
+                ('min_price', models.DecimalField(decimal_places=2, default=None, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, default=None, max_digits=10, null=True)),
+                ('is_sold_out', models.BooleanField(default=False)),
+                ('is_few_left', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['position', 'start_date'],
+                'indexes': [models.Index(fields=['is_active', 'position', 'start_date'], name='booking_eve_is_acti_b8710d_idx'), models.Index(fields=['start_date', 'end_date'], name='booking_eve_start_d_2e8b3e_idx')],
+            },
+        ),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
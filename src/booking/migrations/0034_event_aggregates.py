@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0033_event_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='is_few_left',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='is_sold_out',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='price_end',
+            field=models.DecimalField(decimal_places=2, default=None, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='price_start',
+            field=models.DecimalField(decimal_places=2, default=None, editable=False, max_digits=10, null=True),
+        ),
+    ]
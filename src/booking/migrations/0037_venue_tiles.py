@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0036_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venuelayout',
+            name='tile_manifest',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
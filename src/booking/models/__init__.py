@@ -12,6 +12,8 @@ from .event import (
 )
 from .order import Order, Cart, OrderType, PaymentMode, Answer
 from .product import Product
+from .event_card import EventCard
+from .tombstone import Tombstone
 from .ticket import Ticket
 from .payout import WalletPayout
 from .quota import Quota
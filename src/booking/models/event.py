@@ -1,5 +1,9 @@
+import json
+import math
+import re
 import uuid
 from django.db import models
+from django.db.models import Case, When, Value, Q
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
 from razexOne.storages import PublicMediaStorage
@@ -10,6 +14,7 @@ class EventCity(models.Model):
     city_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     is_top_city = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
 
     def __str__(self):
         return f"{self.name} <{self.city_id}>"
@@ -26,8 +31,10 @@ class EventCategory(models.Model):
     image = models.ImageField(
         upload_to="categories/", storage=PublicMediaStorage, blank=True, null=True
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_top_category = models.BooleanField(default=False)
     position = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
 
     class Meta:
         ordering = ["position", "name"]
@@ -48,6 +55,7 @@ class Subcategory(models.Model):
         EventCategory, on_delete=models.CASCADE, related_name="subcategories"
     )
     position = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
 
     class Meta:
         ordering = ["position", "name"]
@@ -64,12 +72,15 @@ class VenueLayout(models.Model):
     image = models.ImageField(
         upload_to="venue_layouts/", storage=PublicMediaStorage, blank=True, null=True
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     image_height = models.IntegerField(
         blank=True, null=True, validators=[MinValueValidator(0)]
     )
     image_width = models.IntegerField(
         blank=True, null=True, validators=[MinValueValidator(0)]
     )
+    # Zoom pyramid of the image, see VenueTileService
+    tile_manifest = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Layout <{self.name}>"
@@ -85,6 +96,61 @@ class VenueLayoutSection(models.Model):
     def __str__(self):
         return f"{self.name} - {self.layout.name}"
 
+    def clean(self):
+        if self.coordinates:
+            try:
+                self.parse_coordinates(self.coordinates)
+            except ValueError as e:
+                raise ValidationError({"coordinates": str(e)})
+
+    def get_polygon(self):
+        """
+        Points of the section outline in image pixels, None if it has no valid coordinates.
+        """
+        if not self.coordinates:
+            return None
+        try:
+            return self.parse_coordinates(self.coordinates)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def parse_coordinates(value):
+        """
+        Parses the outline of a section into a list of (x, y) points.
+        Accepts a JSON list of [x, y] pairs, of {"x", "y"} objects or of numbers, or
+        numbers separated by commas or spaces like an HTML image map. Two points are
+        the opposite corners of a rectangle.
+        """
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                items = json.loads(value)
+            except json.JSONDecodeError:
+                raise ValueError("Invalid JSON coordinates")
+            numbers = []
+            for item in items:
+                if isinstance(item, dict):
+                    item = [item.get("x"), item.get("y")]
+                numbers.extend(item if isinstance(item, list) else [item])
+        else:
+            numbers = [number for number in re.split(r"[\s,;]+", value) if number]
+        try:
+            numbers = [float(number) for number in numbers]
+        except (TypeError, ValueError):
+            raise ValueError("Coordinates must be numbers")
+        if not all(math.isfinite(number) for number in numbers):
+            raise ValueError("Coordinates must be finite numbers")
+        if len(numbers) % 2:
+            raise ValueError("Coordinates must be x, y pairs")
+        points = list(zip(numbers[::2], numbers[1::2]))
+        if len(points) == 2:
+            (x1, y1), (x2, y2) = points
+            points = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        if len(points) < 3:
+            raise ValueError("A section needs at least 3 points or 2 rectangle corners")
+        return points
+
 
 class Artist(models.Model):
     artist_id = models.AutoField(primary_key=True)
@@ -92,22 +158,39 @@ class Artist(models.Model):
     image = models.ImageField(
         upload_to="artists/", storage=PublicMediaStorage, blank=True, null=True
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True, null=True)
     spotify_link = models.URLField(blank=True, null=True)
     youtube_link = models.URLField(blank=True, null=True)
     instagram_link = models.URLField(blank=True, null=True)
     facebook_link = models.URLField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
 
     def __str__(self):
         return f"{self.name}"
 
 
+class EventQuerySet(models.QuerySet):
+    def with_sale_state(self):
+        """
+        Annotate sale_active, computed in SQL the same way as Event.is_sale_active.
+        """
+        return self.annotate(
+            sale_active=Case(
+                When(Event.sale_active_q(now()), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            )
+        )
+
+
 class Event(models.Model):
     event_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     hero_image = models.ImageField(
         upload_to="events/", storage=PublicMediaStorage, blank=True, null=True
     )
+    hero_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     position = models.PositiveIntegerField(default=0)
     address = models.TextField(blank=True, null=True)
     description = models.TextField(blank=True, null=True)
@@ -128,18 +211,23 @@ class Event(models.Model):
         VenueLayout, on_delete=models.SET_NULL, null=True, default=None
     )
     is_featured = models.BooleanField(default=False)
+    # Maintained from the products and quotas by EventAggregatesService
     price_start = models.DecimalField(
-        max_digits=10, decimal_places=2, null=True, default=None
+        max_digits=10, decimal_places=2, null=True, default=None, editable=False
     )
     price_end = models.DecimalField(
-        max_digits=10, decimal_places=2, null=True, default=None
+        max_digits=10, decimal_places=2, null=True, default=None, editable=False
     )
+    is_sold_out = models.BooleanField(default=False, editable=False)
+    is_few_left = models.BooleanField(default=False, editable=False)
     subtitle = models.CharField(max_length=255, blank=True, null=True)
     highlights = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True, editable=False, null=True)
-    updated_at = models.DateTimeField(auto_now=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
     tac = models.TextField(blank=True, null=True)
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         ordering = ["position", "start_date"]
 
@@ -161,6 +249,18 @@ class Event(models.Model):
     def get_subevents(self):
         return SubEvent.objects.filter(event=self)
 
+    @staticmethod
+    def sale_active_q(_now, prefix=""):
+        """
+        Filter matching the events on sale at the given time, the SQL version of is_sale_active.
+        Prefix is the path to the event, e.g. "event__" when filtering products.
+        """
+        return (
+            Q(**{f"{prefix}is_active": True})
+            & (Q(**{f"{prefix}sale_start__isnull": True}) | Q(**{f"{prefix}sale_start__lte": _now}))
+            & (Q(**{f"{prefix}sale_end__isnull": True}) | Q(**{f"{prefix}sale_end__gte": _now}))
+        )
+
     def is_sale_active(self):
         """Check if tickets/products can be purchased."""
         if not self.is_active:
@@ -174,6 +274,7 @@ class Event(models.Model):
 class EventImage(models.Model):
     image_id = models.AutoField(primary_key=True)
     image = models.ImageField(upload_to="event_images/", storage=PublicMediaStorage)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="images")
     is_active = models.BooleanField(default=True)
 
@@ -225,6 +326,7 @@ class IteneraryItem(models.Model):
         default=None,
     )
     date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
 
     def __str__(self):
         return f"{self.title} - {self.event.name}"
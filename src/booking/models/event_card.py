@@ -0,0 +1,96 @@
+from django.db import models, connection
+from django.db.models import Case, When, Value, Q
+from django.utils.timezone import now
+from .event import Event
+
+
+class EventCardQuerySet(models.QuerySet):
+    def with_sale_state(self):
+        """
+        Annotate sale_active, the card has the same sale columns as the event.
+        """
+        return self.annotate(
+            sale_active=Case(
+                When(Event.sale_active_q(now()), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def filter_ids(self, field, ids):
+        """
+        Cards having any of the ids in one of the id list columns, e.g. filter_ids("city_ids", [1, 2]).
+        """
+        if connection.vendor == "postgresql":
+            # jsonb containment, served by the GIN index.
+            query = Q()
+            for _id in ids:
+                query |= Q(**{f"{field}__contains": [_id]})
+            return self.filter(query)
+        # Other databases cannot query json lists, go through the event relations instead.
+        relation = EventCard.ID_LIST_RELATIONS[field]
+        event_ids = Event.objects.filter(**{f"{relation}__in": ids}).values("event_id")
+        return self.filter(event_id__in=event_ids)
+
+
+class EventCard(models.Model):
+    """
+    Read model of an event for listings and filtering, kept up to date by EventCardService.
+
+    listing is the pre-rendered EventListedSerializer data, the other columns are
+    used for filtering and ordering without joining the event relations.
+    """
+
+    # Id list column -> Event relation it is copied from.
+    ID_LIST_RELATIONS = {
+        "city_ids": "cities",
+        "category_ids": "categories",
+        "subcategory_ids": "subcategories",
+        "artist_ids": "artists",
+    }
+
+    event = models.OneToOneField(
+        Event, on_delete=models.CASCADE, primary_key=True, related_name="card"
+    )
+    listing = models.JSONField(default=dict)
+    position = models.PositiveIntegerField(default=0)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    sale_start = models.DateTimeField(null=True, blank=True)
+    sale_end = models.DateTimeField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    is_featured = models.BooleanField(default=False)
+    city_ids = models.JSONField(default=list)
+    category_ids = models.JSONField(default=list)
+    subcategory_ids = models.JSONField(default=list)
+    artist_ids = models.JSONField(default=list)
+    min_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, default=None
+    )
+    max_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, default=None
+    )
+    is_sold_out = models.BooleanField(default=False)
+    is_few_left = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventCardQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["position", "start_date"]
+        indexes = [
+            models.Index(fields=["is_active", "position", "start_date"]),
+            models.Index(fields=["start_date", "end_date"]),
+        ]
+
+    def __str__(self):
+        return f"Card <{self.event_id}>"
+
+    def is_sale_active(self):
+        """Same as Event.is_sale_active, from the copied columns."""
+        if not self.is_active:
+            return False
+        _now = now()
+        sale_start = self.sale_start or _now
+        sale_end = self.sale_end or _now
+        return sale_start <= _now <= sale_end
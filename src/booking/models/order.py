@@ -440,6 +440,9 @@ class Order(models.Model):
                         print(
                             f"Failed to release quota slots for order {self.order_id}: {e}"
                         )
+                if self.product_id:
+                    event_id = self.product.event_id
+                    transaction.on_commit(lambda: Quota.notify_slots_changed(event_id))
 
             if self.type == OrderType.TICKET:
                 # Cancel tickets
@@ -518,6 +521,9 @@ class Order(models.Model):
                 applied_quota_ids=[quota.quota_id for quota in quotas],
                 end_user_discount_percentage=cart.end_user_discount_percentage,
             )
+            transaction.on_commit(
+                lambda: Quota.notify_slots_changed(order.product.event_id)
+            )
 
             cart.status = "order_created"
             cart.order = order
@@ -595,7 +601,7 @@ class Order(models.Model):
             elif self.type == OrderType.COUPON:
                 self.create_promotion()
             elif self.type == OrderType.WALLET_RECHARGE:
-                wallet = Wallet.get_or_create_wallet(self.user)
+                wallet = Wallet.get_wallet_for_user(self.user)
                 wallet.credit(self.gross_price, "Wallet recharge")
             self.save()
             return True
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Case, When, Value, Q, Prefetch
 from django.core.exceptions import ValidationError
 from django.utils.functional import cached_property
 from django.core.cache import cache
@@ -9,6 +10,28 @@ from .event import Event, VenueLayoutSection, Subevent
 from .quota import Quota
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_sale_state(self):
+        """
+        Annotate sale_active, computed in SQL the same way as Product.is_sale_active
+        so that listing products does not load the event of every product.
+        """
+        _now = now()
+        return self.annotate(
+            sale_active=Case(
+                When(
+                    Q(is_active=True)
+                    & (Q(sale_start__isnull=True) | Q(sale_start__lte=_now))
+                    & (Q(sale_end__isnull=True) | Q(sale_end__gte=_now))
+                    & Event.sale_active_q(_now, prefix="event__"),
+                    then=Value(True),
+                ),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            )
+        )
+
+
 class Product(models.Model):
     product_id = models.AutoField(primary_key=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
@@ -27,6 +50,9 @@ class Product(models.Model):
     )
     is_active = models.BooleanField(default=True)
     tickets_active_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
+
+    objects = ProductQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name} - {self.event.name}"
@@ -51,6 +77,13 @@ class Product(models.Model):
             return False
         return True
 
+    @classmethod
+    def sale_state_prefetch(cls, lookup="product"):
+        """
+        Prefetch the related product with its sale state annotated, e.g. for orders and carts.
+        """
+        return Prefetch(lookup, queryset=cls.objects.with_sale_state())
+
     @cached_property
     def quota_ids(self):
         cache_key = f"product_{self.product_id}_quota_ids"
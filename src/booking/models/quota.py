@@ -1,6 +1,9 @@
 from django.db import models
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from razexOne.settings import AVAILABILITY_CACHE_TIMEOUT
+from booking.services.live import LiveUpdateService
 
 
 class Quota(models.Model):
@@ -23,6 +26,9 @@ class Quota(models.Model):
         return self.name
 
     def clean(self):
+        if hasattr(self.slots_booked, "resolve_expression"):
+            # F() update from create_order/cancel_order, remaining slots are checked under the row lock there.
+            return
         if self.slots_booked > self.max_count:
             raise ValidationError("Slots booked cannot exceed max count")
 
@@ -55,3 +61,68 @@ class Quota(models.Model):
     @classmethod
     def get_quota_for_promotion(cls, promo_id):
         return cls.objects.filter(promo__promo_id=promo_id).first()
+
+    @staticmethod
+    def get_availability_cache_key(event_id):
+        return f"event_{event_id}_availability"
+
+    @classmethod
+    def get_event_availability(cls, event_id):
+        """
+        Remaining slots of the quotas of the active products of an event, as
+        {"quotas": {quota_id: remaining}, "products": {product_id: [quota_ids]}}.
+        Built with a single query and cached for AVAILABILITY_CACHE_TIMEOUT seconds.
+        """
+        cache_key = cls.get_availability_cache_key(event_id)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            snapshot = cls.build_event_availability(event_id)
+            cache.set(cache_key, snapshot, timeout=AVAILABILITY_CACHE_TIMEOUT)
+        return snapshot
+
+    @staticmethod
+    def build_event_availability(event_id):
+        from .product import Product
+
+        rows = Product.objects.filter(event_id=event_id, is_active=True).values_list(
+            "product_id", "quotas__quota_id", "quotas__max_count", "quotas__slots_booked"
+        )
+        snapshot = {"quotas": {}, "products": {}}
+        for product_id, quota_id, max_count, slots_booked in rows:
+            quota_ids = snapshot["products"].setdefault(product_id, [])
+            if quota_id is not None:
+                quota_ids.append(quota_id)
+                snapshot["quotas"][quota_id] = max_count - slots_booked
+        return snapshot
+
+    @staticmethod
+    def get_products_availability(snapshot):
+        """
+        Remaining slots of each product of an availability snapshot, None if it is not limited by a quota.
+        """
+        products = []
+        for product_id, quota_ids in snapshot["products"].items():
+            remaining = None
+            if quota_ids:
+                remaining = max(min(snapshot["quotas"][_id] for _id in quota_ids), 0)
+            products.append(
+                {
+                    "product_id": product_id,
+                    "remaining": remaining,
+                    "is_sold_out": remaining == 0,
+                }
+            )
+        return products
+
+    @classmethod
+    def notify_slots_changed(cls, event_id):
+        """
+        Drop the cached availability of the event, once the booking is committed, and push
+        the availability read from the database to the live subscribers of the event.
+        The cache is rebuilt by the next reader, updating it in place would lose the
+        changes of concurrent bookings.
+        """
+        cache.delete(cls.get_availability_cache_key(event_id))
+        LiveUpdateService.publish_availability(
+            event_id, cls.get_products_availability(cls.build_event_availability(event_id))
+        )
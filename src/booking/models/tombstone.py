@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Deleted catalog objects, so that clients syncing the catalog can drop them.
+    See CatalogSyncService.
+    """
+
+    tombstone_id = models.BigAutoField(primary_key=True)
+    object_type = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.object_type} <{self.object_id}>"
@@ -11,9 +11,13 @@ from booking.models import (
     IteneraryItem,
     Subcategory,
     EventImage,
+    EventCard,
 )
 
 from .product import ProductSerializer
+from booking.services.venue_tiles import VenueTileService
+from base.helpers.sparse_fields import SparseFieldsMixin, get_sparse_params
+from base.helpers.images import ImageVariantsField
 
 
 class EventCitySerializer(serializers.ModelSerializer):
@@ -23,18 +27,24 @@ class EventCitySerializer(serializers.ModelSerializer):
 
 
 class ArtistSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField("image")
+
     class Meta:
         model = Artist
         fields = "__all__"
 
 
 class ArtistListedSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField("image")
+
     class Meta:
         model = Artist
-        fields = ["artist_id", "name", "image"]
+        fields = ["artist_id", "name", "image", "image_variants"]
 
 
 class EventCategorySerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField("image")
+
     class Meta:
         model = EventCategory
         fields = "__all__"
@@ -48,6 +58,7 @@ class SubcategorySerializer(serializers.ModelSerializer):
 
 class EventCategoryDetailSerializer(serializers.ModelSerializer):
     subcategories = SubcategorySerializer(many=True)
+    image_variants = ImageVariantsField("image")
 
     class Meta:
         model = EventCategory
@@ -59,12 +70,26 @@ class VenueLayoutSectionSerializer(serializers.ModelSerializer):
         model = VenueLayoutSection
         fields = "__all__"
 
+    def validate_coordinates(self, value):
+        if value:
+            try:
+                VenueLayoutSection.parse_coordinates(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
 
 class VenueLayoutBaseSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField("image")
+    tile_manifest = serializers.SerializerMethodField()
+
     class Meta:
         model = VenueLayout
         fields = "__all__"
 
+    def get_tile_manifest(self, obj):
+        return VenueTileService.get_manifest_representation(obj)
+
 
 class VenueLayoutSerializer(VenueLayoutBaseSerializer):
     sections = VenueLayoutSectionSerializer(many=True, source="venuelayoutsection_set")
@@ -80,15 +105,20 @@ class SubeventSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class EventBaseSerializer(serializers.ModelSerializer):
+class EventBaseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     is_sale_active = serializers.SerializerMethodField()
+    hero_image_variants = ImageVariantsField("hero_image")
 
     class Meta:
         model = Event
         fields = "__all__"
 
     def get_is_sale_active(self, obj):
-        return obj.is_sale_active()
+        # Use the value annotated by with_sale_state() when the queryset has it.
+        sale_active = getattr(obj, "sale_active", None)
+        if sale_active is None:
+            return obj.is_sale_active()
+        return sale_active
 
     def validate(self, data):
         # Make sure subcategories belong to the selected categories
@@ -140,6 +170,42 @@ class EventListedSerializer(EventBaseSerializer):
             "subtitle",
             "address",
         ]
+        expandable_fields = ["categories", "cities"]
+
+
+class EventCardSerializer(serializers.ModelSerializer):
+    """
+    Renders the same data as EventListedSerializer from the pre-rendered listing of the card.
+    Supports ?fields= and ?expand= like EventListedSerializer.
+    """
+
+    # Nested field -> card column holding its ids when it is not expanded.
+    COLLAPSED_FIELDS = {"categories": "category_ids", "cities": "city_ids"}
+
+    class Meta:
+        model = EventCard
+        fields = ["event"]
+
+    def to_representation(self, card):
+        data = {"is_sale_active": self._get_is_sale_active(card)}
+        data.update(card.listing)
+        data["is_sold_out"] = card.is_sold_out
+        data["is_few_left"] = card.is_few_left
+
+        fields, expand = get_sparse_params(self.context.get("request"))
+        if expand is not None:
+            for name, column in self.COLLAPSED_FIELDS.items():
+                if name not in expand:
+                    data[name] = getattr(card, column)
+        if fields is not None:
+            data = {name: value for name, value in data.items() if name in fields}
+        return data
+
+    def _get_is_sale_active(self, card):
+        sale_active = getattr(card, "sale_active", None)
+        if sale_active is None:
+            return card.is_sale_active()
+        return sale_active
 
 
 class EventDetailSerializer(EventListedSerializer):
@@ -150,6 +216,7 @@ class EventDetailSerializer(EventListedSerializer):
     class Meta:
         model = Event
         exclude = END_USER_EVENT_EXCLUDE_FIELDS
+        expandable_fields = ["categories", "cities", "subevents", "layout", "artists"]
 
 
 class AdminEventDetailSerializer(EventDetailSerializer):
@@ -157,6 +224,7 @@ class AdminEventDetailSerializer(EventDetailSerializer):
     class Meta:
         model = Event
         fields = "__all__"
+        expandable_fields = ["categories", "cities", "subevents", "layout", "artists"]
 
 
 class IteneraryItemSerializer(serializers.ModelSerializer):
@@ -175,6 +243,8 @@ class IteneraryItemSerializer(serializers.ModelSerializer):
 
 
 class EventImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField("image")
+
     class Meta:
         model = EventImage
         fields = "__all__"
@@ -117,11 +117,11 @@ class OrderSerializer(serializers.ModelSerializer):
 
 
 class TicketSerializer(serializers.ModelSerializer):
-    order_id = serializers.IntegerField(source="order.order_id")
-    user_id = serializers.IntegerField(source="user.user_id")
-    product = ProductSerializer(source="product", read_only=True)
+    # Read the raw foreign key columns so that no extra query is made per ticket.
+    order_id = serializers.IntegerField(read_only=True)
+    product = ProductSerializer(read_only=True)
     event = EventBaseSerializer(source="product.event", read_only=True)
 
     class Meta:
         model = Ticket
-        fields = ["ticket_id", "order_id", "user", "is_cancelled", "product"]
+        fields = ["ticket_id", "order_id", "user", "is_cancelled", "product", "event"]
@@ -19,7 +19,11 @@ class ProductSerializer(serializers.ModelSerializer):
         exclude = ("sale_start", "sale_end", "is_active", "tickets_active_until")
 
     def get_is_sale_active(self, obj):
-        return obj.is_sale_active()
+        # Use the value annotated by with_sale_state() when the queryset has it.
+        sale_active = getattr(obj, "sale_active", None)
+        if sale_active is None:
+            return obj.is_sale_active()
+        return sale_active
 
     def validate(self, attrs):
         product = self.instance
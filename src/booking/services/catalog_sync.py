@@ -0,0 +1,152 @@
+from django.db.models import Q
+from django.utils.timezone import now, timedelta
+from booking.models import (
+    Event,
+    EventCity,
+    EventCategory,
+    Subcategory,
+    Artist,
+    IteneraryItem,
+    Product,
+    Tombstone,
+)
+from booking.serializers.event import (
+    EventListedSerializer,
+    EventCitySerializer,
+    EventCategorySerializer,
+    SubcategorySerializer,
+    ArtistSerializer,
+    IteneraryItemSerializer,
+)
+from booking.serializers.product import ProductSerializer
+from razexOne.settings import (
+    DELTA_SYNC_OVERLAP_SECONDS,
+    DELTA_SYNC_TOMBSTONE_RETENTION_DAYS,
+)
+
+OVERLAP = timedelta(seconds=DELTA_SYNC_OVERLAP_SECONDS)
+TOMBSTONE_RETENTION = timedelta(days=DELTA_SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+class CatalogSyncService:
+    """
+    Changes of the catalog since a cursor, for clients keeping a local copy of it.
+
+    Upserts are the objects updated since the cursor, deletes are the ids of the
+    deleted objects (from the Tombstone log) and of the deactivated ones. Products
+    and itinerary items follow their event, they are deleted or upserted again when
+    it is deactivated or reactivated.
+    The cursor is the server time of the previous sync. Objects are matched a bit
+    before it, so that rows committed late are not missed, clients get them twice.
+    """
+
+    MODELS = {
+        "events": Event,
+        "products": Product,
+        "cities": EventCity,
+        "categories": EventCategory,
+        "subcategories": Subcategory,
+        "artists": Artist,
+        "itinerary": IteneraryItem,
+    }
+
+    SERIALIZERS = {
+        "events": EventListedSerializer,
+        "products": ProductSerializer,
+        "cities": EventCitySerializer,
+        "categories": EventCategorySerializer,
+        "subcategories": SubcategorySerializer,
+        "artists": ArtistSerializer,
+        "itinerary": IteneraryItemSerializer,
+    }
+
+    def __init__(self, since=None):
+        self.since = since
+
+    @classmethod
+    def get_object_type(cls, model):
+        for object_type, synced_model in cls.MODELS.items():
+            if synced_model is model:
+                return object_type
+        return None
+
+    @classmethod
+    def record_deletion(cls, instance):
+        object_type = cls.get_object_type(type(instance))
+        if object_type is not None:
+            Tombstone.objects.create(object_type=object_type, object_id=str(instance.pk))
+
+    @staticmethod
+    def purge_tombstones():
+        """
+        Clients with an older cursor get a full sync instead.
+        """
+        return Tombstone.objects.filter(
+            deleted_at__lt=now() - TOMBSTONE_RETENTION
+        ).delete()
+
+    def is_full_sync(self):
+        return self.since is None or self.since < now() - TOMBSTONE_RETENTION
+
+    def get_changes(self):
+        cursor = now()
+        full = self.is_full_sync()
+        changes = {}
+        for object_type in self.MODELS:
+            changes[object_type] = {
+                "upserts": self._get_upserts(object_type, full),
+                "deletes": [] if full else self._get_deletes(object_type),
+            }
+        return {"cursor": cursor, "full": full, "changes": changes}
+
+    def _get_queryset(self, object_type):
+        if object_type == "events":
+            return Event.objects.with_sale_state().prefetch_related("categories", "cities")
+        if object_type == "products":
+            return Product.objects.with_sale_state()
+        return self.MODELS[object_type].objects.all()
+
+    @staticmethod
+    def _get_active_filter(object_type):
+        if object_type == "events":
+            return {"is_active": True}
+        if object_type == "products":
+            return {"is_active": True, "event__is_active": True}
+        if object_type == "itinerary":
+            return {"event__is_active": True}
+        return None
+
+    @staticmethod
+    def _get_changed_q(object_type, since):
+        """
+        Objects updated since the cursor, with their event for the objects that follow it.
+        """
+        if object_type in ("products", "itinerary"):
+            return Q(updated_at__gte=since) | Q(event__updated_at__gte=since)
+        return Q(updated_at__gte=since)
+
+    def _get_upserts(self, object_type, full):
+        queryset = self._get_queryset(object_type)
+        active_filter = self._get_active_filter(object_type)
+        if active_filter:
+            queryset = queryset.filter(**active_filter)
+        if not full:
+            queryset = queryset.filter(self._get_changed_q(object_type, self.since - OVERLAP))
+        return self.SERIALIZERS[object_type](queryset, many=True).data
+
+    def _get_deletes(self, object_type):
+        since = self.since - OVERLAP
+        model = self.MODELS[object_type]
+        object_ids = Tombstone.objects.filter(
+            object_type=object_type, deleted_at__gte=since
+        ).values_list("object_id", flat=True)
+        # Same type as the ids of the upserts
+        deletes = [model._meta.pk.to_python(object_id) for object_id in object_ids]
+        active_filter = self._get_active_filter(object_type)
+        if active_filter:
+            deletes += (
+                model.objects.filter(self._get_changed_q(object_type, since))
+                .exclude(**active_filter)
+                .values_list("pk", flat=True)
+            )
+        return deletes
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import Min, Max
+from django.utils.timezone import now
+from booking.models import Event, Product, Quota
+from booking.services.event_card import EventCardService
+from booking.services.event_page import EventPageService
+from razexOne.settings import EVENT_FEW_LEFT_THRESHOLD
+
+
+class EventAggregatesService:
+    """
+    Maintains the columns of an event derived from its products and quotas:
+    price_start/price_end from the active product prices, is_sold_out/is_few_left
+    from the remaining quota slots.
+
+    Only the event that changed is recomputed, and only the aggregates that can
+    have changed, e.g. booking slots does not touch the prices.
+    """
+
+    @classmethod
+    def schedule_refresh(cls, event_id, prices=True):
+        """
+        Recompute the aggregates once the current transaction commits.
+        """
+        transaction.on_commit(lambda: cls.refresh(event_id, prices=prices))
+
+    @classmethod
+    def refresh(cls, event_id, prices=True):
+        """
+        Returns True if the event changed.
+        """
+        event = Event.objects.filter(pk=event_id).first()
+        if event is None:
+            return False
+        products = Product.objects.filter(event_id=event_id, is_active=True)
+
+        values = {}
+        if prices:
+            values.update(
+                products.aggregate(price_start=Min("price"), price_end=Max("price"))
+            )
+        remaining = cls.get_remaining_slots(products)
+        values["is_sold_out"] = remaining == 0
+        values["is_few_left"] = (
+            remaining is not None and 0 < remaining <= EVENT_FEW_LEFT_THRESHOLD
+        )
+
+        changed = {
+            field: value
+            for field, value in values.items()
+            if getattr(event, field) != value
+        }
+        if not changed:
+            return False
+        # Plain update, the dependent data is refreshed below and saving would refresh it again.
+        Event.objects.filter(pk=event_id).update(updated_at=now(), **changed)
+        EventCardService.refresh(event_id)
+        EventPageService.invalidate(event_id, EventPageService.EVENT)
+        return True
+
+    @staticmethod
+    def get_remaining_slots(products):
+        """
+        Total number of tickets left for the products, None if any of them is not limited by a quota.
+        A product can sell as many tickets as its most restrictive quota allows.
+        """
+        product_ids = list(products.values_list("product_id", flat=True))
+        if not product_ids:
+            return None
+        rows = Quota.objects.filter(products__product_id__in=product_ids).values_list(
+            "products__product_id", "max_count", "slots_booked"
+        )
+        remaining_by_product = {}
+        for product_id, max_count, slots_booked in rows:
+            remaining = max(max_count - slots_booked, 0)
+            current = remaining_by_product.get(product_id)
+            remaining_by_product[product_id] = (
+                remaining if current is None else min(current, remaining)
+            )
+        if len(remaining_by_product) < len(product_ids):
+            return None
+        return sum(remaining_by_product.values())
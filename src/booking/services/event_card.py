@@ -0,0 +1,58 @@
+from django.db import transaction
+from booking.models import Event, EventCard
+from booking.serializers.event import EventListedSerializer
+from booking.services.event_index import EventIndex
+
+
+class EventCardService:
+    """
+    Keeps the EventCard read model in sync with the events and their relations.
+    Prices and availability are copied from the event, see EventAggregatesService.
+    """
+
+    @classmethod
+    def schedule_refresh(cls, event_id):
+        """
+        Refresh the card once the current transaction commits.
+        """
+        transaction.on_commit(lambda: cls.refresh(event_id))
+
+    @classmethod
+    def refresh(cls, event_id):
+        event = (
+            Event.objects.filter(pk=event_id)
+            .prefetch_related("categories", "cities", "subcategories", "artists")
+            .first()
+        )
+        if event is None:
+            EventCard.objects.filter(event_id=event_id).delete()
+            EventIndex.bump_version()
+            return None
+
+        listing = dict(EventListedSerializer(event).data)
+        # Time dependent, computed when the card is read.
+        listing.pop("is_sale_active", None)
+
+        card, _ = EventCard.objects.update_or_create(
+            event=event,
+            defaults={
+                "listing": listing,
+                "position": event.position,
+                "start_date": event.start_date,
+                "end_date": event.end_date,
+                "sale_start": event.sale_start,
+                "sale_end": event.sale_end,
+                "is_active": event.is_active,
+                "is_featured": event.is_featured,
+                "city_ids": [city.city_id for city in event.cities.all()],
+                "category_ids": [c.category_id for c in event.categories.all()],
+                "subcategory_ids": [s.subcategory_id for s in event.subcategories.all()],
+                "artist_ids": [artist.artist_id for artist in event.artists.all()],
+                "min_price": event.price_start,
+                "max_price": event.price_end,
+                "is_sold_out": event.is_sold_out,
+                "is_few_left": event.is_few_left,
+            },
+        )
+        EventIndex.bump_version()
+        return card
@@ -0,0 +1,201 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time as dt_time
+from django.core.cache import cache
+from django.utils import timezone
+from booking.models import EventCard
+from razexOne.settings import EVENT_INDEX_POLL_INTERVAL
+
+VERSION_CACHE_KEY = "event_index_version"
+
+
+class _SortedColumn:
+    """
+    Sorted (value, position) pairs of a column, for range lookups.
+    Events without a value never match a range, like in SQL.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(row for row in rows if row[0] is not None)
+        self.values = [row[0] for row in rows]
+        self.positions = [row[1] for row in rows]
+
+    def get_bits(self, gte=None, lte=None):
+        start = 0 if gte is None else bisect_left(self.values, gte)
+        end = len(self.values) if lte is None else bisect_right(self.values, lte)
+        bits = 0
+        for position in self.positions[start:end]:
+            bits |= 1 << position
+        return bits
+
+
+class _IndexState:
+    """
+    Immutable snapshot of the active event cards.
+
+    Every card gets a dense position, in the default listing order, and each
+    facet value maps to an int used as a bitset of the positions having it.
+    """
+
+    SORTED_COLUMNS = ("start_date", "end_date", "min_price", "max_price")
+
+    def __init__(self, cards, version):
+        self.version = version
+        self.event_ids = [card["event_id"] for card in cards]
+        self.all_bits = (1 << len(cards)) - 1
+        self.featured_bits = 0
+        self.facets = {column: {} for column in EventCard.ID_LIST_RELATIONS}
+        for position, card in enumerate(cards):
+            bit = 1 << position
+            if card["is_featured"]:
+                self.featured_bits |= bit
+            for column, bitsets in self.facets.items():
+                for _id in card[column]:
+                    bitsets[_id] = bitsets.get(_id, 0) | bit
+        for column in self.SORTED_COLUMNS:
+            setattr(
+                self,
+                column,
+                _SortedColumn((card[column], position) for position, card in enumerate(cards)),
+            )
+
+
+class IndexedEvents:
+    """
+    Sequence of the cards matching a bitset, for the paginator.
+    Only the cards of the requested slice are fetched from the database.
+    """
+
+    def __init__(self, event_ids, bits):
+        self.event_ids = event_ids
+        self.bits = bits
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("IndexedEvents only supports slicing")
+        start, stop, _ = index.indices(len(self))
+        event_ids = []
+        bits = self.bits
+        position = 0
+        while bits and position < stop:
+            lowest = bits & -bits
+            if position >= start:
+                event_ids.append(self.event_ids[lowest.bit_length() - 1])
+            bits ^= lowest
+            position += 1
+        cards = EventCard.objects.filter(
+            event_id__in=event_ids, is_active=True
+        ).with_sale_state()
+        cards_by_id = {card.event_id: card for card in cards}
+        return [cards_by_id[_id] for _id in event_ids if _id in cards_by_id]
+
+
+class EventIndex:
+    """
+    Per worker in memory index of the event cards, answering EventCardFilter
+    queries as bitset intersections.
+
+    Every card refresh bumps a version in the cache, workers check it at most
+    once every EVENT_INDEX_POLL_INTERVAL seconds and rebuild when it changed.
+    """
+
+    FACET_PARAMS = {
+        "cities": "city_ids",
+        "categories": "category_ids",
+        "subcategories": "subcategory_ids",
+        "artists": "artist_ids",
+    }
+
+    def __init__(self):
+        self.state = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Singleton pattern to get the EventIndex instance.
+        """
+        if not hasattr(cls, "instance"):
+            cls.instance = cls()
+        return cls.instance
+
+    @staticmethod
+    def bump_version():
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            # Not in the cache yet
+            cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+
+    def filter(self, params):
+        """
+        Returns the IndexedEvents matching the cleaned data of an EventCardFilter form.
+        """
+        state = self.get_state()
+        bits = state.all_bits
+        for param, column in self.FACET_PARAMS.items():
+            ids = params.get(param)
+            if ids:
+                facet_bits = 0
+                for _id in ids:
+                    facet_bits |= state.facets[column].get(_id, 0)
+                bits &= facet_bits
+
+        is_featured = params.get("is_featured")
+        if is_featured is not None:
+            bits &= state.featured_bits if is_featured else ~state.featured_bits
+
+        start_gte = self._to_datetime(params.get("start_date__gte"))
+        start_lte = self._to_datetime(params.get("start_date__lte"))
+        if start_gte or start_lte:
+            bits &= state.start_date.get_bits(gte=start_gte, lte=start_lte)
+        end_gte = self._to_datetime(params.get("end_date__gte"))
+        end_lte = self._to_datetime(params.get("end_date__lte"))
+        if end_gte or end_lte:
+            bits &= state.end_date.get_bits(gte=end_gte, lte=end_lte)
+        on_date = self._to_datetime(params.get("on_date"))
+        if on_date:
+            bits &= state.start_date.get_bits(lte=on_date)
+            bits &= state.end_date.get_bits(gte=on_date)
+
+        if params.get("price__gte") is not None:
+            bits &= state.max_price.get_bits(gte=params["price__gte"])
+        if params.get("price__lte") is not None:
+            bits &= state.min_price.get_bits(lte=params["price__lte"])
+
+        return IndexedEvents(state.event_ids, bits & state.all_bits)
+
+    def get_state(self):
+        if self.state is not None and time.monotonic() - self.checked_at < EVENT_INDEX_POLL_INTERVAL:
+            return self.state
+        with self.lock:
+            if self.state is None or time.monotonic() - self.checked_at >= EVENT_INDEX_POLL_INTERVAL:
+                version = cache.get(VERSION_CACHE_KEY)
+                if self.state is None or version != self.state.version:
+                    self.state = self._build(version)
+                self.checked_at = time.monotonic()
+        return self.state
+
+    @staticmethod
+    def _build(version):
+        cards = EventCard.objects.filter(is_active=True).values(
+            "event_id",
+            "is_featured",
+            *_IndexState.SORTED_COLUMNS,
+            *EventCard.ID_LIST_RELATIONS,
+        )
+        return _IndexState(list(cards), version)
+
+    @staticmethod
+    def _to_datetime(value):
+        # Dates are compared to the datetime columns as midnight, the same as the database does.
+        if value is None:
+            return None
+        return timezone.make_aware(
+            datetime.combine(value, dt_time.min), timezone.get_default_timezone()
+        )
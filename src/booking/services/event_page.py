@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.timezone import now
+from booking.models import Event, Product, Promotion, EventImage, IteneraryItem
+from booking.serializers.event import (
+    EventDetailSerializer,
+    EventImageSerializer,
+    IteneraryItemSerializer,
+)
+from booking.serializers.product import ProductSerializer
+from booking.serializers.promotion import ProductPromotionSerializer
+from razexOne.settings import EVENT_PAGE_CACHE_TIMEOUT
+
+
+class EventPageService:
+    """
+    Builds everything the event detail screen needs in one go.
+    Each section is cached on its own and dropped by the booking signals when
+    one of the models it is built from changes.
+    """
+
+    EVENT = "event"
+    PRODUCTS = "products"
+    PROMOTIONS = "promotions"
+    IMAGES = "images"
+    ITINERARY = "itinerary"
+
+    SECTIONS = (EVENT, PRODUCTS, PROMOTIONS, IMAGES, ITINERARY)
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+
+    @staticmethod
+    def cache_key(event_id, section):
+        return f"event_page_{event_id}_{section}"
+
+    @classmethod
+    def invalidate(cls, event_id, *sections):
+        """
+        Drop the cached sections of an event once the current transaction commits.
+        Drops all the sections if none are given.
+        """
+        keys = [cls.cache_key(event_id, section) for section in sections or cls.SECTIONS]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def get_page(self, sections=SECTIONS):
+        keys = {section: self.cache_key(self.event_id, section) for section in sections}
+        cached = cache.get_many(keys.values())
+        page = {}
+        # Build the event first so that an unknown event is a 404 before anything else is queried.
+        for section in sorted(sections, key=lambda s: s != self.EVENT):
+            key = keys[section]
+            if key in cached:
+                page[section] = cached[key]
+                continue
+            data, timeout = getattr(self, f"_build_{section}")()
+            cache.set(key, data, timeout=timeout)
+            page[section] = data
+        return page
+
+    def _build_event(self):
+        queryset = (
+            Event.objects.filter(is_active=True)
+            .with_sale_state()
+            .select_related("layout")
+            .prefetch_related(
+                "categories",
+                "cities",
+                "subevents",
+                "artists",
+                "layout__venuelayoutsection_set",
+            )
+        )
+        event = get_object_or_404(queryset, pk=self.event_id)
+        data = EventDetailSerializer(event).data
+        return data, self._get_timeout([event.sale_start, event.sale_end])
+
+    def _build_products(self):
+        products = (
+            Product.objects.filter(event_id=self.event_id, is_active=True)
+            .with_sale_state()
+            .select_related("event")
+        )
+        data = ProductSerializer(products, many=True).data
+        boundaries = []
+        for product in products:
+            boundaries += [product.sale_start, product.sale_end]
+        if products:
+            boundaries += [products[0].event.sale_start, products[0].event.sale_end]
+        return data, self._get_timeout(boundaries)
+
+    def _build_promotions(self):
+        promotions = Promotion.get_listing_qs().filter(event_id=self.event_id)
+        return ProductPromotionSerializer(promotions, many=True).data, EVENT_PAGE_CACHE_TIMEOUT
+
+    def _build_images(self):
+        images = EventImage.objects.filter(event_id=self.event_id, is_active=True)
+        return EventImageSerializer(images, many=True).data, EVENT_PAGE_CACHE_TIMEOUT
+
+    def _build_itinerary(self):
+        items = IteneraryItem.objects.filter(event_id=self.event_id)
+        return IteneraryItemSerializer(items, many=True).data, EVENT_PAGE_CACHE_TIMEOUT
+
+    @staticmethod
+    def _get_timeout(boundaries):
+        """
+        Sale state is time dependent, so expire the section when the next sale window opens or closes.
+        """
+        _now = now()
+        timeout = EVENT_PAGE_CACHE_TIMEOUT
+        for boundary in boundaries:
+            if boundary is not None and boundary > _now:
+                timeout = min(timeout, (boundary - _now).total_seconds())
+        return max(int(timeout), 1)
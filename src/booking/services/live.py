@@ -0,0 +1,50 @@
+import json
+import redis
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from razexOne.redis import redis_client
+
+
+class LiveUpdateService:
+    """
+    Publishes availability and order status updates to the Redis channels
+    the live push connections (razexOne.live) are subscribed to.
+    """
+
+    @staticmethod
+    def event_channel(event_id):
+        return f"event:{event_id}"
+
+    @staticmethod
+    def order_channel(order_id):
+        return f"order:{order_id}"
+
+    @classmethod
+    def publish_availability(cls, event_id, products):
+        cls.publish(
+            cls.event_channel(event_id),
+            {"type": "availability", "event_id": event_id, "products": products},
+        )
+
+    @classmethod
+    def publish_order_status(cls, order_id, status):
+        cls.publish(
+            cls.order_channel(order_id),
+            {"type": "order", "order_id": order_id, "status": status},
+        )
+
+    @staticmethod
+    def publish(channel, data):
+        """
+        Publish once the current transaction commits.
+        Push is best effort, clients resync from the API, so failures are only logged.
+        """
+        message = json.dumps(data, cls=DjangoJSONEncoder)
+
+        def _publish():
+            try:
+                redis_client.publish(channel, message)
+            except redis.RedisError as e:
+                print(f"Failed to publish to {channel}: {e}")
+
+        transaction.on_commit(_publish)
@@ -0,0 +1,176 @@
+from django.core.cache import cache
+from django.db import transaction
+from booking.models import Product, Quota, VenueLayoutSection
+from razexOne.settings import VENUE_SECTION_GRID_SIZE
+
+
+def _contains(polygon, x, y):
+    """
+    Even-odd ray casting, points on an edge may fall on either side.
+    """
+    inside = False
+    x1, y1 = polygon[-1]
+    for x2, y2 in polygon:
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _intersects(box, other):
+    return box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]
+
+
+class VenueSectionIndex:
+    """
+    Grid index of the section polygons of a venue layout, to find the sections
+    at a point or in a viewport of the layout image without testing all of them.
+
+    The bounding box of the sections is split in VENUE_SECTION_GRID_SIZE cells per
+    side, each cell listing the sections whose bounding box overlaps it. The index
+    is cached until a section of the layout changes.
+    """
+
+    def __init__(self, sections, bounds, cells):
+        self.sections = sections
+        self.bounds = bounds
+        self.cells = cells
+
+    @staticmethod
+    def cache_key(layout_id):
+        return f"venue_layout_{layout_id}_sections"
+
+    @classmethod
+    def invalidate(cls, layout_id):
+        """
+        Drop the cached index once the current transaction commits.
+        """
+        transaction.on_commit(lambda: cache.delete(cls.cache_key(layout_id)))
+
+    @classmethod
+    def get(cls, layout_id):
+        key = cls.cache_key(layout_id)
+        data = cache.get(key)
+        if data is None:
+            data = cls._build(layout_id)
+            cache.set(key, data, timeout=None)
+        return cls(**data)
+
+    @staticmethod
+    def _build(layout_id):
+        sections = []
+        for section in VenueLayoutSection.objects.filter(layout_id=layout_id).order_by(
+            "section_id"
+        ):
+            polygon = section.get_polygon()
+            if polygon is None:
+                continue
+            xs = [x for x, _ in polygon]
+            ys = [y for _, y in polygon]
+            sections.append(
+                {
+                    "section_id": section.section_id,
+                    "name": section.name,
+                    "polygon": polygon,
+                    "bbox": (min(xs), min(ys), max(xs), max(ys)),
+                }
+            )
+        if not sections:
+            return {"sections": [], "bounds": None, "cells": {}}
+
+        bounds = (
+            min(section["bbox"][0] for section in sections),
+            min(section["bbox"][1] for section in sections),
+            max(section["bbox"][2] for section in sections),
+            max(section["bbox"][3] for section in sections),
+        )
+        cells = {}
+        for index, section in enumerate(sections):
+            for cell in VenueSectionIndex._get_cells(bounds, section["bbox"]):
+                cells.setdefault(cell, []).append(index)
+        return {"sections": sections, "bounds": bounds, "cells": cells}
+
+    @staticmethod
+    def _get_cells(bounds, box):
+        """
+        Grid cells overlapped by the box, clamped to the grid.
+        """
+        width = (bounds[2] - bounds[0]) or 1
+        height = (bounds[3] - bounds[1]) or 1
+
+        def cell(value, start, size):
+            index = int((value - start) / size * VENUE_SECTION_GRID_SIZE)
+            return min(max(index, 0), VENUE_SECTION_GRID_SIZE - 1)
+
+        for cx in range(cell(box[0], bounds[0], width), cell(box[2], bounds[0], width) + 1):
+            for cy in range(cell(box[1], bounds[1], height), cell(box[3], bounds[1], height) + 1):
+                yield (cx, cy)
+
+    def _get_candidates(self, box):
+        if self.bounds is None or not _intersects(self.bounds, box):
+            return []
+        indexes = set()
+        for cell in self._get_cells(self.bounds, box):
+            indexes.update(self.cells.get(cell, ()))
+        return [self.sections[index] for index in sorted(indexes)]
+
+    def hit_test(self, x, y):
+        """
+        The section containing the point, the last defined one if sections overlap.
+        """
+        for section in reversed(self._get_candidates((x, y, x, y))):
+            if _intersects(section["bbox"], (x, y, x, y)) and _contains(section["polygon"], x, y):
+                return section
+        return None
+
+    def in_viewport(self, x_min, y_min, x_max, y_max):
+        """
+        The sections whose bounding box overlaps the viewport.
+        """
+        box = (x_min, y_min, x_max, y_max)
+        return [
+            section for section in self._get_candidates(box) if _intersects(section["bbox"], box)
+        ]
+
+    @staticmethod
+    def with_products(event_id, sections):
+        """
+        Adds the active products of the event in each section, with their availability.
+        """
+        if not sections:
+            return []
+        section_ids = [section["section_id"] for section in sections]
+        products = (
+            Product.objects.filter(event_id=event_id, is_active=True, section_id__in=section_ids)
+            .with_sale_state()
+            .values("product_id", "name", "price", "section_id", "sale_active")
+            .order_by("price")
+        )
+        availability = {
+            product["product_id"]: product
+            for product in Quota.get_products_availability(
+                Quota.get_event_availability(event_id)
+            )
+        }
+        products_by_section = {}
+        for product in products:
+            remaining = availability.get(product["product_id"], {})
+            products_by_section.setdefault(product["section_id"], []).append(
+                {
+                    "product_id": product["product_id"],
+                    "name": product["name"],
+                    "price": product["price"],
+                    "is_sale_active": product["sale_active"],
+                    "remaining": remaining.get("remaining"),
+                    "is_sold_out": remaining.get("is_sold_out", False),
+                }
+            )
+        return [
+            {
+                "section_id": section["section_id"],
+                "name": section["name"],
+                "polygon": section["polygon"],
+                "products": products_by_section.get(section["section_id"], []),
+            }
+            for section in sections
+        ]
@@ -0,0 +1,175 @@
+import math
+import uuid
+import redis
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+from razexOne.redis import redis_client, blocking_redis_client
+from razexOne.settings import VENUE_TILE_SIZE, VENUE_TILE_FORMAT, VENUE_TILE_QUALITY
+
+# Pillow format -> file extension
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+
+class VenueTileService:
+    """
+    Cuts the venue layout images into a zoom pyramid of square tiles, so that
+    clients only download the visible region at the current zoom.
+
+    The highest zoom level is the image at full size, every level below is half
+    the size of the next one, down to a level fitting in a single tile. Tiles are
+    stored under a new folder for every image, at <path><zoom>/<x>_<y>.<format>,
+    and described by the tile_manifest of the layout.
+
+    Uploads only queue the layout in Redis, the tiles are generated by the
+    venue_tile_worker command.
+    """
+
+    QUEUE_KEY = "venue_tiles_queue"
+
+    @classmethod
+    def schedule_refresh(cls, layout):
+        """
+        Queue the layout for the tile worker once the upload is committed.
+        """
+        transaction.on_commit(lambda: cls.enqueue(layout.layout_id))
+
+    @classmethod
+    def enqueue(cls, layout_id):
+        try:
+            redis_client.lpush(cls.QUEUE_KEY, layout_id)
+        except redis.RedisError as e:
+            # The worker catches up on the outdated layouts when it starts
+            print(f"Failed to queue the tiles of layout {layout_id}: {e}")
+
+    @classmethod
+    def pop(cls, timeout):
+        item = blocking_redis_client.brpop(cls.QUEUE_KEY, timeout=timeout)
+        return int(item[1]) if item else None
+
+    @classmethod
+    def refresh(cls, layout):
+        """
+        Regenerates the tiles when the image changed since they were generated.
+        """
+        current = layout.tile_manifest or {}
+        source = layout.image.name if layout.image else None
+        if current.get("source") == source:
+            return False
+        manifest = {}
+        if source:
+            try:
+                manifest = cls.generate(layout)
+            except Exception as e:
+                print(f"Failed to generate the tiles of layout {layout.layout_id}: {e}")
+                return False
+            layout.image_width = manifest["width"]
+            layout.image_height = manifest["height"]
+        cls.delete_tiles(layout.image.storage, current)
+        layout.tile_manifest = manifest
+        layout.save(update_fields=["tile_manifest", "image_width", "image_height"])
+        return True
+
+    @staticmethod
+    def get_levels(width, height):
+        max_zoom = math.ceil(math.log2(max(width, height, VENUE_TILE_SIZE) / VENUE_TILE_SIZE))
+        levels = []
+        for zoom in range(max_zoom + 1):
+            scale = 2 ** (max_zoom - zoom)
+            level_width = max(math.ceil(width / scale), 1)
+            level_height = max(math.ceil(height / scale), 1)
+            levels.append(
+                {
+                    "zoom": zoom,
+                    "width": level_width,
+                    "height": level_height,
+                    "columns": math.ceil(level_width / VENUE_TILE_SIZE),
+                    "rows": math.ceil(level_height / VENUE_TILE_SIZE),
+                }
+            )
+        return levels
+
+    @classmethod
+    def generate(cls, layout):
+        storage = layout.image.storage
+        with storage.open(layout.image.name, "rb") as f:
+            image = Image.open(f)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        if VENUE_TILE_FORMAT == "JPEG":
+            image = image.convert("RGB")
+
+        extension = EXTENSIONS[VENUE_TILE_FORMAT]
+        path = f"venue_layouts/tiles/{layout.layout_id}/{uuid.uuid4().hex[:12]}/"
+        levels = cls.get_levels(image.width, image.height)
+        # From the full size down, each level is resized from the previous one.
+        level_image = image
+        for level in reversed(levels):
+            if level_image.size != (level["width"], level["height"]):
+                level_image = level_image.resize(
+                    (level["width"], level["height"]), Image.LANCZOS
+                )
+            for x in range(level["columns"]):
+                for y in range(level["rows"]):
+                    box = (
+                        x * VENUE_TILE_SIZE,
+                        y * VENUE_TILE_SIZE,
+                        min((x + 1) * VENUE_TILE_SIZE, level["width"]),
+                        min((y + 1) * VENUE_TILE_SIZE, level["height"]),
+                    )
+                    buffer = BytesIO()
+                    level_image.crop(box).save(
+                        buffer, format=VENUE_TILE_FORMAT, quality=VENUE_TILE_QUALITY
+                    )
+                    storage.save(
+                        f"{path}{level['zoom']}/{x}_{y}.{extension}",
+                        ContentFile(buffer.getvalue()),
+                    )
+        return {
+            "source": layout.image.name,
+            "path": path,
+            "format": extension,
+            "tile_size": VENUE_TILE_SIZE,
+            "width": image.width,
+            "height": image.height,
+            "max_zoom": len(levels) - 1,
+            "levels": levels,
+        }
+
+    @staticmethod
+    def get_tile_names(manifest):
+        for level in manifest.get("levels", []):
+            for x in range(level["columns"]):
+                for y in range(level["rows"]):
+                    yield f"{manifest['path']}{level['zoom']}/{x}_{y}.{manifest['format']}"
+
+    @classmethod
+    def delete_tiles(cls, storage, manifest):
+        for name in cls.get_tile_names(manifest or {}):
+            try:
+                storage.delete(name)
+            except Exception as e:
+                print(f"Failed to delete tile {name}: {e}")
+
+    @staticmethod
+    def get_manifest_representation(layout):
+        """
+        The manifest for the clients, tiles are at url_template with {z}, {x} and {y} replaced.
+        """
+        manifest = layout.tile_manifest
+        if not manifest:
+            return None
+        base_url = layout.image.storage.url(manifest["path"])
+        if not base_url.endswith("/"):
+            base_url += "/"
+        return {
+            "url_template": f"{base_url}{{z}}/{{x}}_{{y}}.{manifest['format']}",
+            "tile_size": manifest["tile_size"],
+            "width": manifest["width"],
+            "height": manifest["height"],
+            "max_zoom": manifest["max_zoom"],
+            "levels": manifest["levels"],
+        }
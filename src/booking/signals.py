@@ -0,0 +1,263 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils.timezone import now
+from booking.models import (
+    Event,
+    EventCity,
+    EventCategory,
+    Subcategory,
+    Artist,
+    VenueLayout,
+    VenueLayoutSection,
+    Subevent,
+    EventImage,
+    IteneraryItem,
+    Product,
+    Promotion,
+    Quota,
+    Order,
+)
+from booking.services.event_page import EventPageService
+from booking.services.event_card import EventCardService
+from booking.services.event_aggregates import EventAggregatesService
+from booking.services.live import LiveUpdateService
+from booking.services.catalog_sync import CatalogSyncService
+from booking.services.venue_tiles import VenueTileService
+from booking.services.venue_sections import VenueSectionIndex
+from base.helpers.images import schedule_image_variants
+
+
+# Event page cache invalidation
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_page(sender, instance, **kwargs):
+    EventPageService.invalidate(instance.event_id)
+
+
+@receiver(m2m_changed, sender=Event.cities.through)
+@receiver(m2m_changed, sender=Event.categories.through)
+@receiver(m2m_changed, sender=Event.subcategories.through)
+@receiver(m2m_changed, sender=Event.artists.through)
+def invalidate_event_page_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            EventPageService.invalidate(instance.event_id, EventPageService.EVENT)
+        return
+    # Changed from the other side, e.g. artist.events.add(...)
+    if action in ("post_add", "post_remove"):
+        event_ids = pk_set
+    elif action == "pre_clear":
+        event_ids = instance.events.values_list("event_id", flat=True)
+    else:
+        return
+    for event_id in event_ids:
+        EventPageService.invalidate(event_id, EventPageService.EVENT)
+
+
+# pre_delete, since the relations are already gone by post_delete.
+@receiver([post_save, pre_delete], sender=EventCity)
+@receiver([post_save, pre_delete], sender=EventCategory)
+@receiver([post_save, pre_delete], sender=Subcategory)
+@receiver([post_save, pre_delete], sender=Artist)
+def invalidate_event_page_for_related(sender, instance, **kwargs):
+    # Nested in the event section of every event linked to it.
+    for event_id in instance.events.values_list("event_id", flat=True):
+        EventPageService.invalidate(event_id, EventPageService.EVENT)
+
+
+@receiver([post_save, pre_delete], sender=VenueLayout)
+def invalidate_event_page_for_layout(sender, instance, **kwargs):
+    for event_id in Event.objects.filter(layout=instance).values_list("event_id", flat=True):
+        EventPageService.invalidate(event_id, EventPageService.EVENT)
+
+
+@receiver([post_save, post_delete], sender=VenueLayoutSection)
+def invalidate_event_page_for_layout_section(sender, instance, **kwargs):
+    event_ids = Event.objects.filter(layout_id=instance.layout_id).values_list(
+        "event_id", flat=True
+    )
+    for event_id in event_ids:
+        EventPageService.invalidate(event_id, EventPageService.EVENT)
+
+
+@receiver([post_save, post_delete], sender=Subevent)
+def invalidate_event_page_for_subevent(sender, instance, **kwargs):
+    EventPageService.invalidate(instance.event_id, EventPageService.EVENT)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_event_page_products(sender, instance, **kwargs):
+    EventPageService.invalidate(instance.event_id, EventPageService.PRODUCTS)
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+def invalidate_event_page_promotions(sender, instance, **kwargs):
+    EventPageService.invalidate(instance.event_id, EventPageService.PROMOTIONS)
+
+
+@receiver([post_save, post_delete], sender=EventImage)
+def invalidate_event_page_images(sender, instance, **kwargs):
+    EventPageService.invalidate(instance.event_id, EventPageService.IMAGES)
+
+
+@receiver([post_save, post_delete], sender=IteneraryItem)
+def invalidate_event_page_itinerary(sender, instance, **kwargs):
+    EventPageService.invalidate(instance.event_id, EventPageService.ITINERARY)
+
+
+# Event card maintenance, cards are refreshed on commit.
+
+
+@receiver([post_save, post_delete], sender=Event)
+def refresh_event_card(sender, instance, **kwargs):
+    EventCardService.schedule_refresh(instance.event_id)
+
+
+@receiver(m2m_changed, sender=Event.cities.through)
+@receiver(m2m_changed, sender=Event.categories.through)
+@receiver(m2m_changed, sender=Event.subcategories.through)
+@receiver(m2m_changed, sender=Event.artists.through)
+def refresh_event_card_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            EventCardService.schedule_refresh(instance.event_id)
+        return
+    if action in ("post_add", "post_remove"):
+        event_ids = pk_set
+    elif action == "pre_clear":
+        event_ids = list(instance.events.values_list("event_id", flat=True))
+    else:
+        return
+    for event_id in event_ids:
+        EventCardService.schedule_refresh(event_id)
+
+
+@receiver([post_save, pre_delete], sender=EventCity)
+@receiver([post_save, pre_delete], sender=EventCategory)
+@receiver([post_save, pre_delete], sender=Subcategory)
+@receiver([post_save, pre_delete], sender=Artist)
+def refresh_event_card_for_related(sender, instance, **kwargs):
+    # Cities and categories are nested in the listing, all of them are in the id lists.
+    for event_id in instance.events.values_list("event_id", flat=True):
+        EventCardService.schedule_refresh(event_id)
+
+
+# Event price and availability aggregates
+
+
+@receiver([post_save, post_delete], sender=Product)
+def refresh_event_aggregates_for_product(sender, instance, **kwargs):
+    EventAggregatesService.schedule_refresh(instance.event_id)
+
+
+@receiver([post_save, pre_delete], sender=Quota)
+def refresh_event_aggregates_for_quota(sender, instance, **kwargs):
+    # Slots are booked and released through Quota.save(), see Order.create_order
+    event_ids = Event.objects.filter(product__quotas=instance).values_list(
+        "event_id", flat=True
+    )
+    for event_id in set(event_ids):
+        EventAggregatesService.schedule_refresh(event_id, prices=False)
+
+
+@receiver(m2m_changed, sender=Quota.products.through)
+def refresh_event_aggregates_for_quota_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        # instance is a product
+        event_ids = [instance.event_id]
+    elif action == "pre_clear":
+        event_ids = Event.objects.filter(product__quotas=instance).values_list("event_id", flat=True)
+    else:
+        event_ids = Product.objects.filter(product_id__in=pk_set).values_list("event_id", flat=True)
+    for event_id in set(event_ids):
+        EventAggregatesService.schedule_refresh(event_id, prices=False)
+
+
+# Live push
+
+
+@receiver(post_save, sender=Order)
+def publish_order_status(sender, instance, **kwargs):
+    LiveUpdateService.publish_order_status(instance.order_id, instance.status)
+
+
+# Catalog delta sync
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=EventCity)
+@receiver(post_delete, sender=EventCategory)
+@receiver(post_delete, sender=Subcategory)
+@receiver(post_delete, sender=Artist)
+@receiver(post_delete, sender=IteneraryItem)
+def record_catalog_deletion(sender, instance, **kwargs):
+    CatalogSyncService.record_deletion(instance)
+
+
+@receiver(m2m_changed, sender=Event.cities.through)
+@receiver(m2m_changed, sender=Event.categories.through)
+@receiver(m2m_changed, sender=Event.subcategories.through)
+@receiver(m2m_changed, sender=Event.artists.through)
+def touch_event_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    # Relations are part of the synced event, but changing them does not save the event.
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            Event.objects.filter(pk=instance.event_id).update(updated_at=now())
+        return
+    if action in ("post_add", "post_remove"):
+        Event.objects.filter(pk__in=pk_set).update(updated_at=now())
+    elif action == "pre_clear":
+        instance.events.update(updated_at=now())
+
+
+@receiver(post_save, sender=EventCity)
+@receiver(post_save, sender=EventCategory)
+def touch_events_for_related(sender, instance, **kwargs):
+    # Nested in the synced events
+    instance.events.update(updated_at=now())
+
+
+# Image variants
+
+
+IMAGE_FIELDS = {
+    Event: "hero_image",
+    EventImage: "image",
+    Artist: "image",
+    EventCategory: "image",
+    VenueLayout: "image",
+}
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=EventImage)
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=EventCategory)
+@receiver(post_save, sender=VenueLayout)
+def update_image_variants(sender, instance, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    schedule_image_variants(instance, field_name)
+
+
+# Venue layout tiles
+
+
+@receiver(post_save, sender=VenueLayout)
+def update_venue_tiles(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "image" not in update_fields:
+        return
+    VenueTileService.schedule_refresh(instance)
+
+
+# Venue section index
+
+
+@receiver([post_save, post_delete], sender=VenueLayoutSection)
+def invalidate_venue_section_index(sender, instance, **kwargs):
+    VenueSectionIndex.invalidate(instance.layout_id)
@@ -30,6 +30,7 @@ from .views.webhook import WebhookViewSet
 from .views.payout import WalletPayoutViewSet
 from .views.promotion import AdminPromotionViewSet, OwnerPromotionViewSet, ProductPromotionViewSet
 from .views.question import AdminQuestionViewSet
+from .views.catalog import CatalogViewSet
 
 router = routers.DefaultRouter()
 
@@ -39,6 +40,7 @@ router.register(r"cities", EventCityListViewSet)
 router.register(r"categories", EventCategoryListViewSet)
 router.register(r"artists", ArtistViewSet)
 router.register(r"itenerary", IteneraryItemViewSet)
+router.register(r"catalog", CatalogViewSet, basename="catalog")
 
 router.register(r"admin/events", AdminEventViewSet, basename="admin-events")
 router.register(
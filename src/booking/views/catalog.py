@@ -0,0 +1,38 @@
+from rest_framework import viewsets, exceptions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.utils.dateparse import parse_datetime
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from booking.services.catalog_sync import CatalogSyncService
+
+
+class CatalogViewSet(viewsets.ViewSet):
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "since",
+                openapi.IN_QUERY,
+                description="cursor returned by the previous sync, omit for a full sync",
+                type=openapi.TYPE_STRING,
+            ),
+        ],
+        operation_summary="Catalog changes since the previous sync.",
+        operation_description="""
+        Returns the events, products, cities, categories, subcategories, artists and itinerary items
+        created or updated since the cursor as upserts, and the ids of the deleted or deactivated ones as deletes.
+        Products and itinerary items of deleted events should be dropped as well.
+        When full is true the upserts are the whole catalog and the local copy should be replaced.
+        Store the returned cursor and send it as since on the next sync.
+        """,
+    )
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        since = request.query_params.get("since")
+        if since:
+            since = parse_datetime(since)
+            if since is None or since.tzinfo is None:
+                raise exceptions.ValidationError("Invalid cursor.")
+        return Response(CatalogSyncService(since or None).get_changes())
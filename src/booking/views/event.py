@@ -3,6 +3,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from booking.models import (
     Event,
+    EventCard,
     EventCity,
     EventCategory,
     VenueLayoutSection,
@@ -12,6 +13,7 @@ from booking.models import (
     IteneraryItem,
     Subcategory,
     EventImage,
+    Quota,
 )
 from booking.serializers.event import (
     EventBaseSerializer,
@@ -31,9 +33,15 @@ from booking.serializers.event import (
     EventCategoryDetailSerializer,
     EventImageSerializer,
     CatalogSectionSerializer,
+    EventCardSerializer,
 )
-from booking.filters.event import EventFilter
+from booking.filters.event import EventFilter, EventCardFilter
+from base.helpers.sparse_fields import SparseFieldsViewMixin
+from booking.services.event_page import EventPageService
+from booking.services.event_index import EventIndex
+from booking.services.venue_sections import VenueSectionIndex
 from base.helpers.api_permissions import AdminPermission
+from base.helpers.uploads import PresignedUploadMixin
 from rest_framework import exceptions
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -44,25 +52,45 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import FormParser, MultiPartParser
 from django.shortcuts import get_object_or_404
+import math
+import uuid
 
 
-def _get_event_queryset(action, active_only=True):
+def _get_event_queryset(active_only=True):
     queryset = (
-        Event.objects.all().prefetch_related("categories").prefetch_related("cities")
+        Event.objects.with_sale_state()
+        .prefetch_related("categories")
+        .prefetch_related("cities")
     )
     if active_only:
         queryset = queryset.filter(is_active=True)
-    if action == "retrieve":
-        queryset = queryset.prefetch_related("subevents").select_related("layout")
     return queryset
 
 
-class EventViewSet(viewsets.ReadOnlyModelViewSet):
+# Relations to fetch for each serializer field, see SparseFieldsViewMixin.
+EVENT_SPARSE_RELATED_FIELDS = {
+    "categories": ["categories"],
+    "cities": ["cities"],
+    "subcategories": ["subcategories"],
+    "subevents": ["subevents"],
+    "artists": ["artists"],
+    "layout": ["layout", "layout__venuelayoutsection_set"],
+}
+
+
+class EventViewSet(SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Use ?fields= to only get some of the fields and ?expand= to choose
+    which nested fields are expanded, the others are returned as ids.
+    """
+
     serializer_class = EventListedSerializer
+    sparse_related_fields = EVENT_SPARSE_RELATED_FIELDS
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = EventFilter
     ordering_fields = ["start_date"]
     search_fields = ["name"]
+    throttle_scopes = {"list": [("event_list", "user")]}
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -74,8 +102,47 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
         if getattr(self, "swagger_fake_view", False):
             return Event.objects.none()
 
-        queryset = _get_event_queryset(self.action)
-        return queryset
+        queryset = Event.objects.filter(is_active=True).with_sale_state()
+        return self.get_sparse_queryset(queryset)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="Comma separated fields to return",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "expand",
+                openapi.IN_QUERY,
+                description="Comma separated nested fields to expand, the others are returned as ids",
+                type=openapi.TYPE_STRING,
+            ),
+        ],
+        responses={200: EventListedSerializer(many=True)},
+    )
+    def list(self, request, *args, **kwargs):
+        """
+        Served from the EventCard read model, so that listing and filtering
+        does not have to join the event relations.
+        Filters are answered by the in memory EventIndex, only custom orderings go to the database.
+        """
+        queryset = EventCard.objects.filter(is_active=True).with_sale_state()
+        filterset = EventCardFilter(request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise exceptions.ValidationError(filterset.errors)
+        if request.query_params.get("ordering"):
+            queryset = filters.OrderingFilter().filter_queryset(request, filterset.qs, self)
+        else:
+            queryset = EventIndex.get_instance().filter(filterset.form.cleaned_data)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = EventCardSerializer(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        serializer = EventCardSerializer(queryset, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
 
     @swagger_auto_schema(
         method="get",
@@ -130,7 +197,7 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
             section = dict()
             section["subcategory"] = SubcategorySerializer(subcategory).data
             section["events"] = list()
-            events = _get_event_queryset("list").filter(subcategories=subcategory)
+            events = _get_event_queryset().filter(subcategories=subcategory)
             if city:
                 events = events.filter(cities=city)
             events = events.distinct()
@@ -140,6 +207,193 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
 
         return Response(resp)
 
+    @swagger_auto_schema(
+        method="get",
+        operation_summary="Everything needed by the event detail screen in one call.",
+        operation_description="""
+        Returns the event details along with its products, images, itinerary and,
+        for logged in users, the listed promotions. Each section is cached separately.
+        """,
+    )
+    @action(detail=True, methods=["get"])
+    def page(self, request, pk=None):
+        sections = list(EventPageService.SECTIONS)
+        if not request.user.is_authenticated:
+            # Listed promotions are only available to logged in users.
+            sections.remove(EventPageService.PROMOTIONS)
+        try:
+            # Normalise the id so that it matches the cache keys used for invalidation.
+            event_id = uuid.UUID(pk)
+        except ValueError:
+            raise exceptions.NotFound()
+        page = EventPageService(event_id).get_page(sections)
+        return Response(page)
+
+    @swagger_auto_schema(
+        method="get",
+        operation_summary="Remaining capacity of every product of the event.",
+        operation_description="""
+        remaining is null for products not limited by any quota.
+        Cached for a couple of seconds, meant to be polled for sold out badges.
+        """,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "products": openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                "product_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                "remaining": openapi.Schema(
+                                    type=openapi.TYPE_INTEGER, x_nullable=True
+                                ),
+                                "is_sold_out": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                            },
+                        ),
+                    )
+                },
+            )
+        },
+    )
+    @action(detail=True, methods=["get"])
+    def availability(self, request, pk=None):
+        try:
+            event_id = uuid.UUID(pk)
+        except ValueError:
+            raise exceptions.NotFound()
+        snapshot = Quota.get_event_availability(event_id)
+        if not snapshot["products"] and not Event.objects.filter(pk=event_id).exists():
+            raise exceptions.NotFound()
+
+        return Response({"products": Quota.get_products_availability(snapshot)})
+
+    def _get_layout_id(self, pk):
+        try:
+            event_id = uuid.UUID(pk)
+        except ValueError:
+            raise exceptions.NotFound()
+        event = Event.objects.filter(pk=event_id, is_active=True).values("layout_id").first()
+        if event is None:
+            raise exceptions.NotFound()
+        return event_id, event["layout_id"]
+
+    @staticmethod
+    def _get_coordinate(request, name, required=True):
+        value = request.query_params.get(name)
+        if value is None and not required:
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError({name: "A number is required."})
+        if not math.isfinite(value):
+            raise exceptions.ValidationError({name: "A finite number is required."})
+        return value
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "x",
+                openapi.IN_QUERY,
+                description="pixels of the layout image",
+                type=openapi.TYPE_NUMBER,
+                required=True,
+            ),
+            openapi.Parameter(
+                "y",
+                openapi.IN_QUERY,
+                description="pixels of the layout image",
+                type=openapi.TYPE_NUMBER,
+                required=True,
+            ),
+        ],
+        operation_summary="Section of the event layout at a point.",
+        operation_description="""
+        Returns the section containing the point, with its products and their availability,
+        section is null when the point is outside every section.
+        """,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "section": openapi.Schema(type=openapi.TYPE_OBJECT, x_nullable=True),
+                },
+            )
+        },
+    )
+    @action(detail=True, methods=["get"])
+    def hit_test(self, request, pk=None):
+        event_id, layout_id = self._get_layout_id(pk)
+        x = self._get_coordinate(request, "x")
+        y = self._get_coordinate(request, "y")
+        section = None
+        if layout_id is not None:
+            section = VenueSectionIndex.get(layout_id).hit_test(x, y)
+        if section is None:
+            return Response({"section": None})
+        return Response({"section": VenueSectionIndex.with_products(event_id, [section])[0]})
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(name, openapi.IN_QUERY, type=openapi.TYPE_NUMBER)
+            for name in ("x_min", "y_min", "x_max", "y_max")
+        ],
+        operation_summary="Sections of the event layout in a viewport.",
+        operation_description="""
+        Returns the sections overlapping the viewport, in pixels of the layout image,
+        with their outline, products and availability. Without a viewport returns all the sections.
+        """,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "sections": openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                "section_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                "name": openapi.Schema(type=openapi.TYPE_STRING),
+                                "polygon": openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_ARRAY,
+                                        items=openapi.Schema(type=openapi.TYPE_NUMBER),
+                                    ),
+                                ),
+                                "products": openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                                ),
+                            },
+                        ),
+                    )
+                },
+            )
+        },
+    )
+    @action(detail=True, methods=["get"])
+    def viewport(self, request, pk=None):
+        event_id, layout_id = self._get_layout_id(pk)
+        if layout_id is None:
+            return Response({"sections": []})
+        index = VenueSectionIndex.get(layout_id)
+        box = [
+            self._get_coordinate(request, name, required=False)
+            for name in ("x_min", "y_min", "x_max", "y_max")
+        ]
+        if all(value is None for value in box):
+            sections = index.sections
+        elif any(value is None for value in box):
+            raise exceptions.ValidationError("x_min, y_min, x_max and y_max are required together.")
+        else:
+            sections = index.in_viewport(*box)
+        return Response({"sections": VenueSectionIndex.with_products(event_id, sections)})
+
     @swagger_auto_schema(
         operation_description="Terms and conditions for the event.",
     )
@@ -200,7 +454,7 @@ class ArtistViewSet(viewsets.ReadOnlyModelViewSet):
 # Admin ViewSets
 
 
-class AdminEventViewSet(viewsets.ModelViewSet):
+class AdminEventViewSet(PresignedUploadMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     Adding multiple categories, subcategories etc. does not work currently in swagger.
     There is an issue with the swagger schema generation, the generated curl send these fields as comma separated values which is not supported by the API.
@@ -214,6 +468,8 @@ class AdminEventViewSet(viewsets.ModelViewSet):
     serializer_class = EventBaseSerializer
     permission_classes = [AdminPermission]
     parser_classes = (FormParser, MultiPartParser)
+    sparse_related_fields = EVENT_SPARSE_RELATED_FIELDS
+    presigned_upload_fields = ["hero_image"]
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -223,7 +479,7 @@ class AdminEventViewSet(viewsets.ModelViewSet):
         return EventBaseSerializer
 
     def get_queryset(self):
-        return _get_event_queryset(self.action, active_only=False)
+        return self.get_sparse_queryset(Event.objects.with_sale_state())
 
 
 class AdminSubeventViewSet(viewsets.ModelViewSet):
@@ -251,11 +507,12 @@ class AdminSubcategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [AdminPermission]
 
 
-class AdminArtistViewSet(viewsets.ModelViewSet):
+class AdminArtistViewSet(PresignedUploadMixin, viewsets.ModelViewSet):
     queryset = Artist.objects.all()
     serializer_class = ArtistSerializer
     permission_classes = [AdminPermission]
     parser_classes = (FormParser, MultiPartParser)
+    presigned_upload_fields = ["image"]
 
 
 class AdminVenueLayoutSectionViewSet(viewsets.ModelViewSet):
@@ -4,7 +4,7 @@ from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from booking.models import Cart, Order, Ticket, Product, Answer
+from booking.models import Cart, Order, Ticket, Product, Answer, Event
 from booking.serializers.order import (
     CartSerializer,
     OrderSerializer,
@@ -14,17 +14,81 @@ from booking.serializers.order import (
 )
 from booking.serializers.question import QuestionSerializer
 from base.helpers.api_permissions import AdminPermission
+from base.helpers.uploads import PresignedUploadMixin
+from razexOne.storages import prefetch_urls
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from booking.services.order import CartService, OrderService
+from booking.filters.order import OrderFilter, TicketFilter
 from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.utils.encoders import JSONEncoder
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import StreamingHttpResponse
+from django.db.models import Prefetch
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework import exceptions
+from asgiref.sync import sync_to_async
+from itertools import islice
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def get_ticket_prefetches():
+    """
+    Everything TicketSerializer renders, with the sale state annotated.
+    Built per request, the sale state is computed against the current time.
+    """
+    return [
+        Product.sale_state_prefetch(),
+        Prefetch("product__event", queryset=Event.objects.with_sale_state()),
+        "product__event__cities",
+        "product__event__categories",
+        "product__event__subcategories",
+        "product__event__artists",
+    ]
+
+
+def _stream_json_list(queryset, serializer_class):
+    """
+    Serialize the queryset as a JSON array, one row at a time.
+    Uses a server-side cursor (on Postgres) so the whole table is never loaded in memory.
+    """
+    encoder = JSONEncoder()
+    yield "["
+    for index, obj in enumerate(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+        if index:
+            yield ","
+        yield encoder.encode(serializer_class(obj).data)
+    yield "]"
+
+
+def _next_parts(iterator, count):
+    return list(islice(iterator, count))
+
+
+async def _aiter_in_thread(iterable, count=EXPORT_CHUNK_SIZE):
+    """
+    Async iterator over a sync one, read count items at a time in the sync thread of
+    the request. Under ASGI Django reads sync streaming content whole before sending it.
+    """
+    iterator = iter(iterable)
+    while parts := await sync_to_async(_next_parts)(iterator, count):
+        for part in parts:
+            yield part
+
+
+def _json_list_response(request, queryset, serializer_class):
+    content = _stream_json_list(queryset, serializer_class)
+    if isinstance(request._request, ASGIRequest):
+        content = _aiter_in_thread(content)
+    return StreamingHttpResponse(content, content_type="application/json")
+
 
 # User APIs
 
 
-class AnswerViewSet(viewsets.ModelViewSet):
+class AnswerViewSet(PresignedUploadMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = AnswerSerializer
     parser_classes = (FormParser, MultiPartParser)
@@ -32,6 +96,7 @@ class AnswerViewSet(viewsets.ModelViewSet):
     filterset_fields = ["cart", "order"]
     http_method_names = ["get", "post", "patch", "delete"]
     queryset = Answer.objects.none()
+    presigned_upload_fields = ["file"]
 
     def get_queryset(self):
         """
@@ -45,6 +110,16 @@ class AnswerViewSet(viewsets.ModelViewSet):
         )
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        answers = list(page if page is not None else queryset)
+        prefetch_urls(answers, "file")
+        serializer = self.get_serializer(answers, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def get_serializer_class(self):
         """
         Return AnswerDetailSerializer for retrieve action.
@@ -75,6 +150,11 @@ class AnswerViewSet(viewsets.ModelViewSet):
         self.perform_update(serializer)
         return Response(serializer.data)
 
+    def check_upload_allowed(self, instance):
+        # Same rule as the answer serializer
+        if instance.question and not instance.question.can_modify_later and instance.order:
+            raise exceptions.ValidationError("This answer cannot modified after order creation")
+
     """
     Custom delete method to disallow deleting answer if order is created and can_modify_later is False.
     """
@@ -96,9 +176,16 @@ class AnswerViewSet(viewsets.ModelViewSet):
 
 class CartViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    throttle_scopes = {
+        "create_cart": [("cart_create", "user")],
+        "update_quanity": [("cart_update", "user")],
+        "change_payment_mode": [("cart_update", "user")],
+    }
 
     def list(self, request):
-        carts = Cart.objects.filter(user=request.user)
+        carts = Cart.objects.filter(user=request.user).prefetch_related(
+            Product.sale_state_prefetch()
+        )
         return Response(CartSerializer(carts, many=True).data)
 
     def retrieve(self, request, pk=None):
@@ -215,7 +302,9 @@ class OrderViewSet(viewsets.ViewSet):
         """
         List all orders for the logged in user.
         """
-        orders = Order.objects.filter(user=request.user)
+        orders = Order.objects.filter(user=request.user).prefetch_related(
+            Product.sale_state_prefetch()
+        )
         return Response(OrderSerializer(orders, many=True).data)
 
     def retrieve(self, request, pk=None):
@@ -342,21 +431,29 @@ class TicketViewSet(viewsets.ViewSet):
         """
         Only shows active tickets for the logged in user.
         """
-        tickets = Ticket.get_active_qs().filter(user=request.user)
+        tickets = (
+            Ticket.get_active_qs()
+            .filter(user=request.user)
+            .prefetch_related(*get_ticket_prefetches())
+        )
         return Response(TicketSerializer(tickets, many=True).data)
 
 
 # Admin APIs
-class AdminOrderViewSet(viewsets.ViewSet):
-    permission_classes = [AdminPermission]
+class AdminOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Paginated list of all orders, filterable by event, product, status and date.
+    Use the export endpoint to stream all the matching orders at once.
+    """
 
-    def list(self, request):
-        orders = Order.objects.all()
-        return Response(OrderSerializer(orders, many=True).data)
+    permission_classes = [AdminPermission]
+    serializer_class = OrderSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
+    queryset = Order.objects.order_by("-order_id")
 
-    def retrieve(self, request, pk=None):
-        order = get_object_or_404(Order, pk=pk)
-        return Response(OrderSerializer(order).data)
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(Product.sale_state_prefetch())
 
     @swagger_auto_schema(
         method="post",
@@ -378,14 +475,34 @@ class AdminOrderViewSet(viewsets.ViewSet):
             except ValidationError as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @swagger_auto_schema(
+        operation_description="Stream all the orders matching the filters as a JSON array, without pagination.",
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return _json_list_response(request, queryset, OrderSerializer)
+
+
+class AdminTicketViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Paginated list of all tickets, filterable by event, product, order status and order date.
+    Use the export endpoint to stream all the matching tickets at once.
+    """
 
-class AdminTicketViewSet(viewsets.ViewSet):
     permission_classes = [AdminPermission]
+    serializer_class = TicketSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TicketFilter
+    queryset = Ticket.objects.order_by("-ticket_id")
 
-    def list(self, request):
-        tickets = Ticket.objects.all()
-        return Response(TicketSerializer(tickets, many=True).data)
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(*get_ticket_prefetches())
 
-    def retrieve(self, request, pk=None):
-        ticket = get_object_or_404(Ticket, pk=pk)
-        return Response(TicketSerializer(ticket).data)
+    @swagger_auto_schema(
+        operation_description="Stream all the tickets matching the filters as a JSON array, without pagination.",
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return _json_list_response(request, queryset, TicketSerializer)
@@ -20,6 +20,10 @@ class AdminProductViewSet(viewsets.ModelViewSet):
     filterset_fields = ["event", "section", "is_active", "name", "subevent"]
     ordering_fields = ["name"]
 
+    def get_queryset(self):
+        # Annotated per request, the sale state depends on the current time
+        return super().get_queryset().with_sale_state()
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return AdminProductDetailSerializer
@@ -27,12 +31,16 @@ class AdminProductViewSet(viewsets.ModelViewSet):
 
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Product.objects.filter(is_active=True)
+    queryset = Product.objects.filter(is_active=True, event__is_active=True)
     serializer_class = ProductSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["event", "subevent"]
     ordering_fields = ["name"]
 
+    def get_queryset(self):
+        # Annotated per request, the sale state depends on the current time
+        return super().get_queryset().with_sale_state()
+
     def get_serializer_class(self):
         return ProductSerializer
 
@@ -2,6 +2,7 @@
 ASGI config for razexOne project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Besides Django it serves the live push connections, see razexOne.live.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +14,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'razexOne.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up, it uses the models.
+from razexOne.live import LiveApplication  # noqa: E402
+
+application = LiveApplication(django_application)
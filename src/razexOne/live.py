@@ -0,0 +1,370 @@
+"""
+Live push over Server-Sent Events and WebSockets, served next to Django by razexOne.asgi.
+
+    /live/events/<event_id>/   availability of the products of an active event, public
+    /live/orders/<order_id>/   status of an order, only for its owner
+
+A plain GET streams Server-Sent Events, a WebSocket connection to the same path
+receives the same JSON messages. The current state is sent on connect, then every
+update published by booking.services.LiveUpdateService on the matching Redis channel.
+
+    /live/orders/<order_id>/wait/?status=<known status>&timeout=<seconds>
+
+Long polling for clients without SSE or WebSockets, e.g. after payment: returns
+{"order_id", "status"} as soon as the status differs from ?status=, or the current
+status after ?timeout= seconds, at most ORDER_STATUS_WAIT_TIMEOUT.
+"""
+
+import asyncio
+import json
+import re
+import time
+import uuid
+from urllib.parse import parse_qs
+import redis
+from asgiref.sync import sync_to_async
+from django.http.request import HttpHeaders
+from rest_framework.exceptions import AuthenticationFailed
+from razexOne.redis import async_redis_client
+from razexOne.settings import LIVE_HEARTBEAT_INTERVAL, LIVE_QUEUE_SIZE, ORDER_STATUS_WAIT_TIMEOUT
+from base.auth import RazexAuthentication
+from booking.models import Event, Order, Quota
+from booking.services.live import LiveUpdateService
+
+EVENT_PATH = re.compile(r"^/live/events/(?P<event_id>[0-9a-fA-F-]{32,36})/?$")
+ORDER_PATH = re.compile(r"^/live/orders/(?P<order_id>\d+)/?$")
+ORDER_WAIT_PATH = re.compile(r"^/live/orders/(?P<order_id>\d+)/wait/?$")
+
+
+class LiveError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Broadcaster:
+    """
+    Shares a single Redis pub/sub connection between all the live connections of the process,
+    each connection gets an asyncio queue of the messages of its channel.
+    """
+
+    def __init__(self):
+        self.queues = {}
+        self.pubsub = None
+        self.reader = None
+        self.lock = asyncio.Lock()
+
+    async def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        async with self.lock:
+            if self.pubsub is None:
+                self.pubsub = async_redis_client.pubsub()
+            if channel not in self.queues:
+                await self.pubsub.subscribe(channel)
+                self.queues[channel] = set()
+            self.queues[channel].add(queue)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, channel, queue):
+        async with self.lock:
+            queues = self.queues.get(channel)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self.queues[channel]
+                try:
+                    await self.pubsub.unsubscribe(channel)
+                except redis.RedisError as e:
+                    print(f"Failed to unsubscribe from {channel}: {e}")
+
+    async def _read(self):
+        while True:
+            if not self.queues:
+                await asyncio.sleep(1)
+                continue
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except redis.RedisError as e:
+                # The subscriptions are restored by redis-py when it reconnects.
+                print(f"Live pub/sub connection failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            for queue in list(self.queues.get(message["channel"], ())):
+                if queue.full():
+                    # Slow client, only the latest state matters.
+                    queue.get_nowait()
+                queue.put_nowait(message["data"])
+
+
+broadcaster = Broadcaster()
+
+
+def _get_headers(scope):
+    meta = {}
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        meta[key] = value.decode("latin1")
+    return HttpHeaders(meta)
+
+
+class _TokenRequest:
+    """
+    The part of a DRF request used by the token authentication backends.
+    """
+
+    def __init__(self, scope):
+        self.headers = _get_headers(scope)
+
+
+def _authenticate(scope):
+    try:
+        result = RazexAuthentication().authenticate_token(_TokenRequest(scope))
+    except AuthenticationFailed as e:
+        raise LiveError(401, str(e.detail))
+    if result is None:
+        raise LiveError(401, "Authentication credentials were not provided.")
+    return result[0]
+
+
+def _get_event_subscription(event_id):
+    try:
+        event_id = uuid.UUID(event_id)
+    except ValueError:
+        raise LiveError(404, "Not found.")
+    # Only the active events, so that connections can not be held open on any channel
+    if not Event.objects.filter(event_id=event_id, is_active=True).exists():
+        raise LiveError(404, "Not found.")
+    snapshot = Quota.get_event_availability(event_id)
+    initial = {
+        "type": "availability",
+        "event_id": str(event_id),
+        "products": Quota.get_products_availability(snapshot),
+    }
+    return LiveUpdateService.event_channel(event_id), initial
+
+
+def _get_order_subscription(scope, order_id):
+    user = _authenticate(scope)
+    order = Order.objects.filter(order_id=order_id, user=user).only("status").first()
+    if order is None:
+        raise LiveError(404, "Not found.")
+    initial = {"type": "order", "order_id": order.order_id, "status": order.status}
+    return LiveUpdateService.order_channel(order.order_id), initial
+
+
+@sync_to_async
+def get_subscription(scope):
+    """
+    Returns the Redis channel and the current state for the path, raises LiveError if it is not allowed.
+    """
+    match = EVENT_PATH.match(scope["path"])
+    if match:
+        return _get_event_subscription(match["event_id"])
+    match = ORDER_PATH.match(scope["path"])
+    if match:
+        return _get_order_subscription(scope, int(match["order_id"]))
+    raise LiveError(404, "Not found.")
+
+
+async def _next_message(queue, disconnected):
+    """
+    Waits for a message, returns None on heartbeat timeout and raises CancelledError on disconnect.
+    """
+    get = asyncio.ensure_future(queue.get())
+    done, _ = await asyncio.wait(
+        {get, disconnected},
+        timeout=LIVE_HEARTBEAT_INTERVAL,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    if get in done:
+        return get.result()
+    get.cancel()
+    if disconnected in done:
+        raise asyncio.CancelledError()
+    return None
+
+
+async def _wait_for(receive, message_type):
+    while True:
+        message = await receive()
+        if message["type"] == message_type:
+            return message
+
+
+async def serve_sse(scope, receive, send):
+    try:
+        channel, initial = await get_subscription(scope)
+        queue = await broadcaster.subscribe(channel)
+    except LiveError as e:
+        await _send_http_error(send, e.status, e.message)
+        return
+    except redis.RedisError:
+        await _send_http_error(send, 503, "Live updates are not available.")
+        return
+
+    disconnected = asyncio.ensure_future(_wait_for(receive, "http.disconnect"))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        data = json.dumps(initial)
+        await send({"type": "http.response.body", "body": f"data: {data}\n\n".encode(), "more_body": True})
+        while True:
+            data = await _next_message(queue, disconnected)
+            body = ": ping\n\n" if data is None else f"data: {data}\n\n"
+            await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+    except (asyncio.CancelledError, OSError):
+        pass
+    finally:
+        disconnected.cancel()
+        await broadcaster.unsubscribe(channel, queue)
+
+
+async def serve_websocket(scope, receive, send):
+    await _wait_for(receive, "websocket.connect")
+    try:
+        channel, initial = await get_subscription(scope)
+        queue = await broadcaster.subscribe(channel)
+    except LiveError as e:
+        # Closing before accepting rejects the handshake
+        await send({"type": "websocket.close", "code": 4000 + e.status})
+        return
+    except redis.RedisError:
+        await send({"type": "websocket.close", "code": 1013})
+        return
+
+    await send({"type": "websocket.accept"})
+    disconnected = asyncio.ensure_future(_wait_for(receive, "websocket.disconnect"))
+    try:
+        await send({"type": "websocket.send", "text": json.dumps(initial)})
+        while True:
+            data = await _next_message(queue, disconnected)
+            if data is not None:
+                await send({"type": "websocket.send", "text": data})
+    except (asyncio.CancelledError, OSError):
+        pass
+    finally:
+        disconnected.cancel()
+        await broadcaster.unsubscribe(channel, queue)
+
+
+def _get_wait_params(scope):
+    params = parse_qs(scope.get("query_string", b"").decode("latin1"))
+    known_status = params.get("status", [None])[0]
+    try:
+        timeout = int(params.get("timeout", [ORDER_STATUS_WAIT_TIMEOUT])[0])
+    except ValueError:
+        raise LiveError(400, "timeout should be a number.")
+    return known_status, min(max(timeout, 0), ORDER_STATUS_WAIT_TIMEOUT)
+
+
+async def serve_order_wait(scope, receive, send, order_id):
+    """
+    Long polling of the order status, waits on the shared pub/sub connection without holding a thread.
+    """
+    try:
+        known_status, timeout = _get_wait_params(scope)
+    except LiveError as e:
+        await _send_http_error(send, e.status, e.message)
+        return
+
+    channel = LiveUpdateService.order_channel(order_id)
+    # Subscribe before reading the status so that a change in between is not missed.
+    queue = None
+    if known_status and timeout:
+        try:
+            queue = await broadcaster.subscribe(channel)
+        except redis.RedisError as e:
+            # Answer right away, the client polls again.
+            print(f"Failed to subscribe to order {order_id} updates: {e}")
+
+    disconnected = asyncio.ensure_future(_wait_for(receive, "http.disconnect"))
+    try:
+        try:
+            _, initial = await sync_to_async(_get_order_subscription)(scope, order_id)
+        except LiveError as e:
+            await _send_http_error(send, e.status, e.message)
+            return
+        order_status = initial["status"]
+        deadline = time.monotonic() + timeout
+        while queue is not None and order_status == known_status:
+            get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnected},
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if get not in done:
+                get.cancel()
+                if disconnected in done:
+                    return
+                break
+            order_status = json.loads(get.result())["status"]
+        await _send_json(send, 200, {"order_id": order_id, "status": order_status})
+    except OSError:
+        pass
+    finally:
+        disconnected.cancel()
+        if queue is not None:
+            await broadcaster.unsubscribe(channel, queue)
+
+
+async def _send_json(send, status, data):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"cache-control", b"no-cache"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(data).encode()})
+
+
+async def _send_http_error(send, status, message):
+    await _send_json(send, status, {"detail": message})
+
+
+class LiveApplication:
+    """
+    Serves the /live/ paths and hands everything else to Django.
+    """
+
+    PREFIX = "/live/"
+
+    def __init__(self, django_application):
+        self.django_application = django_application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket" and scope["path"].startswith(self.PREFIX):
+            return await serve_websocket(scope, receive, send)
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"].startswith(self.PREFIX)
+        ):
+            match = ORDER_WAIT_PATH.match(scope["path"])
+            if match:
+                return await serve_order_wait(scope, receive, send, int(match["order_id"]))
+            return await serve_sse(scope, receive, send)
+        return await self.django_application(scope, receive, send)
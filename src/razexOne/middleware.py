@@ -0,0 +1,35 @@
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.module_loading import import_string
+from razexOne.settings import SPLIT_STACK_MIDDLEWARE, TOKEN_API_PREFIX
+
+
+class SplitStackMiddleware:
+    """
+    Runs SPLIT_STACK_MIDDLEWARE (sessions, auth, messages, ...) only for the requests
+    that can use them. Token authenticated API requests skip them, they do not
+    have a session and RazexAuthentication sets the user from the token.
+
+    Everything else, the admin, the docs and API requests without a token, gets the full stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.full_stack = get_response
+        for path in reversed(SPLIT_STACK_MIDDLEWARE):
+            try:
+                self.full_stack = import_string(path)(self.full_stack)
+            except MiddlewareNotUsed:
+                pass
+
+    @staticmethod
+    def is_token_request(request):
+        if not request.path_info.startswith(TOKEN_API_PREFIX):
+            return False
+        return request.headers.get("Authorization", "").startswith("Bearer ") or bool(
+            request.headers.get("Jwt")
+        )
+
+    def __call__(self, request):
+        if self.is_token_request(request):
+            return self.get_response(request)
+        return self.full_stack(request)
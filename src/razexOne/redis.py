@@ -1,3 +1,20 @@
 import redis
+import redis.asyncio
+from .settings import REDIS_URL, REDIS_SOCKET_TIMEOUT
 
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
+redis_client = redis.StrictRedis.from_url(
+    REDIS_URL,
+    decode_responses=True,
+    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+)
+
+# For the ASGI live push connections, see razexOne.live
+async_redis_client = redis.asyncio.StrictRedis.from_url(
+    REDIS_URL, decode_responses=True, socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+)
+
+# Without a socket timeout, for blocking reads like the SMS queue, see razexOne.sms
+blocking_redis_client = redis.StrictRedis.from_url(
+    REDIS_URL, decode_responses=True, socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+)
@@ -79,26 +79,44 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
-    "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.SessionAuthentication",
-        "base.auth.FirebaseAuthentication",
-        "base.auth.OTPAuthentication",
-        "base.auth.NativeAuthentication",
-    ],
+    # Dispatches to the Firebase, OTP and native backends, or to the session
+    "DEFAULT_AUTHENTICATION_CLASSES": ["base.auth.RazexAuthentication"],
     "PAGE_SIZE": 100,
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # Proxies in front of the server appending to X-Forwarded-For, the load balancer
+    # terminating TLS outside DEBUG. The client IP of the throttles and the OTP limits.
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0 if DEBUG else 1),
+    # Sliding window limits of the view actions listed in their throttle_scopes
+    "DEFAULT_THROTTLE_CLASSES": ["base.helpers.throttling.SlidingWindowThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "cart_create": "20/min",  # Each cart is inserted and priced
+        "cart_update": "60/min",  # Quantity and payment mode changes reprice the cart
+        "event_list": "120/min",  # Filtered event lists, per user or IP
+        "otp_send": "5/min",  # Bursts of OTP requests from an IP, on top of OTP_IP_SEND_LIMIT
+        "otp_verify": "10/hour",  # Tries per phone number and IP, across new codes
+        "otp_verify_phone": "30/hour",  # Tries per phone number from all the IPs
+    },
 }
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     # "django.middleware.csrf.CsrfViewMiddleware",
+    # Runs SPLIT_STACK_MIDDLEWARE except for token authenticated API requests
+    "razexOne.middleware.SplitStackMiddleware",
+]
+
+# Middleware skipped by token authenticated requests to TOKEN_API_PREFIX
+SPLIT_STACK_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+TOKEN_API_PREFIX = "/api/"
+# The admin checks only look at MIDDLEWARE, SplitStackMiddleware runs these for the admin
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
 
 ROOT_URLCONF = "razexOne.urls"
 
@@ -133,6 +151,22 @@ DATABASES = {
 # Hack to load the database config from the environment variable
 
 
+# Cache
+# Shared Redis cache at REDIS_URL when USE_REDIS_CACHE is set (default outside DEBUG), per-process memory cache otherwise.
+
+REDIS_URL = env("REDIS_URL", default="redis://localhost:6379/0")
+USE_REDIS_CACHE = env.bool("USE_REDIS_CACHE", default=not DEBUG)
+REDIS_SOCKET_TIMEOUT = 1  # Seconds, so that a Redis outage does not hang requests
+
+if USE_REDIS_CACHE:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -268,9 +302,95 @@ AWS_S3_OBJECT_PARAMETERS = {
 
 # Private Media (for restricted images)
 PRIVATE_MEDIA_LOCATION = "private"
+PRIVATE_MEDIA_URL_EXPIRY = 60 * 60  # Seconds the signed urls are valid
+PRIVATE_MEDIA_URL_CACHE_MARGIN = 5 * 60  # Cached urls are renewed this long before they expire
+PRIVATE_MEDIA_URL_LOCAL_CACHE_SIZE = 10000  # Signed urls kept in memory by each process
 PUBLIC_MEDIA_LOCATION = "media"
 
 
 # OTP Configuration
 OTP_EXPIRY_AFTER_MINUTES = 5  # OTP will expire after 5 minutes
 OTP_SEND_INTERVAL_SECONDS = 60  # User can request OTP every 60 seconds
+OTP_MAX_ATTEMPTS = 5  # Wrong codes before the OTP is dropped
+OTP_IP_WINDOW_SECONDS = 60 * 60  # Window of the per IP limits
+OTP_IP_SEND_LIMIT = 10  # OTPs an IP can send per window
+OTP_IP_VERIFY_LIMIT = 30  # OTPs an IP can try per window
+
+
+# SMS queue (razexOne.sms)
+SMS_PROVIDER = env("SMS_PROVIDER", default="sns")  # Provider of the sms_worker, "local" only prints them
+SMS_PROVIDERS = {
+    # Concurrency is the number of sends in flight per worker process
+    "sns": {"class": "razexOne.sms.SNSProvider", "concurrency": 8},
+    "local": {"class": "razexOne.sms.LocalProvider", "concurrency": 1},
+}
+SMS_MAX_ATTEMPTS = 5  # Sends of a message before giving up
+SMS_RETRY_DELAY = 2  # Seconds before the first retry, doubled on every attempt
+SMS_LATENCY_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000)  # Ms, buckets of the latency metrics
+
+
+# Event page cache
+EVENT_PAGE_CACHE_TIMEOUT = 5 * 60  # Sections are also invalidated on model changes
+
+
+# Event cards
+EVENT_FEW_LEFT_THRESHOLD = 20  # Remaining tickets below which an event is shown as few left
+EVENT_INDEX_POLL_INTERVAL = 5  # Seconds between checks for changed cards by the in memory event index
+
+
+# Event availability
+AVAILABILITY_CACHE_TIMEOUT = 2  # Seconds, updated in place when orders book or release slots
+
+
+# Live push (razexOne.live)
+LIVE_HEARTBEAT_INTERVAL = 15  # Seconds between keep alive messages on idle connections
+LIVE_QUEUE_SIZE = 16  # Pending messages per connection, the oldest are dropped for slow clients
+ORDER_STATUS_WAIT_TIMEOUT = 25  # Max seconds /live/orders/{id}/wait/ waits, below the usual proxy timeouts
+
+
+# Catalog delta sync
+DELTA_SYNC_OVERLAP_SECONDS = 60  # Changes are matched this long before the cursor, for late commits
+DELTA_SYNC_TOMBSTONE_RETENTION_DAYS = 90  # Older cursors get a full sync
+
+
+# Batch API (base.views.BatchView)
+BATCH_MAX_REQUESTS = 10  # Sub-requests per batch
+BATCH_MAX_WORKERS = 4  # Sub-requests run in parallel, each thread uses its own database connection
+
+
+# Image variants (base.helpers.images)
+IMAGE_VARIANT_WIDTHS = [320, 640, 1280]  # Pixels, generated when smaller than the original
+IMAGE_VARIANT_FORMATS = ["WEBP", "JPEG"]  # JPEG for the clients without WebP support
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_PLACEHOLDER_WIDTH = 16  # Pixels of the blurred placeholder inlined in the responses
+
+
+# Venue layout tiles (booking.services.venue_tiles)
+VENUE_TILE_SIZE = 256  # Pixels, square tiles
+VENUE_TILE_FORMAT = "WEBP"
+VENUE_TILE_QUALITY = 80
+
+
+# Venue section hit-test (booking.services.venue_sections)
+VENUE_SECTION_GRID_SIZE = 32  # Cells per side of the grid indexing the section outlines
+
+
+# Presigned uploads (base.helpers.uploads)
+PRESIGNED_UPLOAD_EXPIRY = 10 * 60  # Seconds the presigned POST can be used
+PRESIGNED_UPLOAD_TICKET_EXPIRY = 60 * 60  # Seconds to finalize, leaves time for slow uploads
+PRESIGNED_UPLOAD_MAX_SIZE = 10 * 1024 * 1024  # Bytes
+PRESIGNED_UPLOAD_IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp"]
+PRESIGNED_UPLOAD_FILE_TYPES = PRESIGNED_UPLOAD_IMAGE_TYPES + ["application/pdf"]
+
+
+# Firebase ID token verification (base.helpers.firebase)
+FIREBASE_TOKEN_CACHE_SIZE = 10000  # Verified tokens kept in memory by each process
+FIREBASE_TOKEN_SHARED_CACHE = env.bool("FIREBASE_TOKEN_SHARED_CACHE", default=False)  # Also share them through the Django cache
+FIREBASE_CERTS_MIN_REFRESH_INTERVAL = 60  # Seconds, the certificates are refreshed at half their max age
+FIREBASE_PROFILE_WORKERS = 2  # Threads per process completing new users with their Firebase profile
+
+
+# Authenticated user cache (base.helpers.user_cache)
+USER_CACHE_TIMEOUT = 10 * 60  # Seconds in the shared cache, dropped when the user is saved
+USER_CACHE_LOCAL_TTL = 10  # Seconds in the per process cache, other processes may be this late after a change
+USER_CACHE_LOCAL_SIZE = 10000
@@ -0,0 +1,299 @@
+import json
+import time
+import uuid
+import boto3
+import redis
+from botocore.config import Config
+from django.utils.module_loading import import_string
+from .redis import redis_client, blocking_redis_client
+from .settings import (
+    AWS_ACCESS_KEY_ID,
+    AWS_SECRET_ACCESS_KEY,
+    AWS_S3_REGION_NAME,
+    SMS_PROVIDER,
+    SMS_PROVIDERS,
+    SMS_MAX_ATTEMPTS,
+    SMS_RETRY_DELAY,
+    SMS_LATENCY_BUCKETS,
+)
+
+OTP_MESSAGE = "Your OTP is {otp}. It is valid for {expiry_in_mins} minutes. Team RazexOne"
+
+
+class PermanentSMSError(Exception):
+    """
+    The message can not be sent, retrying will not help.
+    """
+
+
+class SNSProvider:
+    """
+    Sends with AWS SNS, one client shared by the threads of the worker with a connection
+    pool as large as their number.
+    """
+
+    def __init__(self, concurrency):
+        self.client = boto3.client(
+            "sns",
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            region_name=AWS_S3_REGION_NAME,
+            config=Config(
+                max_pool_connections=concurrency,
+                retries={"max_attempts": 0},
+                # Well within the stop grace period of the worker
+                connect_timeout=5,
+                read_timeout=10,
+            ),
+        )
+
+    def send(self, phone_number, message):
+        try:
+            response = self.client.publish(
+                PhoneNumber=phone_number,
+                Message=message,
+                MessageAttributes={
+                    "AWS.SNS.SMS.SenderID": {
+                        "DataType": "String",
+                        "StringValue": "RazexOne",
+                    },
+                    "AWS.SNS.SMS.SMSType": {
+                        "DataType": "String",
+                        "StringValue": "Transactional",
+                    },
+                },
+            )
+        except (
+            self.client.exceptions.InvalidParameterException,
+            self.client.exceptions.InvalidParameterValueException,
+        ) as e:
+            raise PermanentSMSError(str(e))
+        return response["MessageId"]
+
+
+class LocalProvider:
+    """
+    Keeps the messages in memory and prints them, for development and tests.
+    """
+
+    def __init__(self, concurrency):
+        self.sent = []
+
+    def send(self, phone_number, message):
+        self.sent.append((phone_number, message))
+        print(f"SMS to {phone_number}: {message}")
+        return uuid.uuid4().hex
+
+
+class SMSQueue:
+    """
+    Outbox of the SMS, so that requests do not wait for the provider. Jobs are pushed
+    to a Redis list and sent by the sms_worker command with the SMS_PROVIDER provider.
+
+    Failed sends are retried up to SMS_MAX_ATTEMPTS times, SMS_RETRY_DELAY seconds later,
+    doubled on every attempt, from a sorted set by due time. Jobs that expire before
+    they are sent, like OTPs, are dropped.
+
+    Popped jobs are moved to a processing list of the worker until they are done.
+    Workers keep a heartbeat key alive, the jobs left in the list of a worker whose
+    heartbeat expired, killed in the middle of a send, are queued again.
+    """
+
+    QUEUE_KEY = "sms_queue"
+    RETRY_KEY = "sms_retry"
+    METRICS_KEY = "sms_metrics"
+    WORKERS_KEY = "sms_workers"
+    HEARTBEAT_TIMEOUT = 30  # Seconds without heartbeat before the jobs of a worker are recovered
+
+    @classmethod
+    def enqueue(cls, phone_number, message, expires_in=None):
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "phone_number": phone_number,
+            "message": message,
+            "attempts": 0,
+            "enqueued_at": now,
+            "expires_at": now + expires_in if expires_in else None,
+        }
+        redis_client.lpush(cls.QUEUE_KEY, json.dumps(job))
+        return job["id"]
+
+    @classmethod
+    def enqueue_otp(cls, phone_number, otp, expiry_in_mins):
+        return cls.enqueue(
+            phone_number,
+            OTP_MESSAGE.format(otp=otp, expiry_in_mins=expiry_in_mins),
+            expires_in=expiry_in_mins * 60,
+        )
+
+    @staticmethod
+    def get_provider(name=SMS_PROVIDER):
+        config = SMS_PROVIDERS[name]
+        return import_string(config["class"])(config["concurrency"])
+
+    @staticmethod
+    def get_processing_key(worker_id):
+        return f"sms_processing_{worker_id}"
+
+    @staticmethod
+    def get_heartbeat_key(worker_id):
+        return f"sms_worker_{worker_id}"
+
+    @classmethod
+    def pop(cls, worker_id, timeout):
+        """
+        Returns the next job and its queue item, to give to ack once it is done.
+        """
+        item = blocking_redis_client.blmove(
+            cls.QUEUE_KEY, cls.get_processing_key(worker_id), timeout, "RIGHT", "LEFT"
+        )
+        return (json.loads(item), item) if item else (None, None)
+
+    @classmethod
+    def ack(cls, worker_id, item, tries=3):
+        """
+        Removes the job from the processing list of the worker, a job left there is
+        sent again when the worker is released or recovered.
+        """
+        for attempt in range(tries):
+            try:
+                redis_client.lrem(cls.get_processing_key(worker_id), 1, item)
+                return
+            except redis.RedisError as e:
+                print(f"Failed to acknowledge SMS: {e}")
+                time.sleep(attempt + 1)
+
+    @classmethod
+    def heartbeat(cls, worker_id):
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.sadd(cls.WORKERS_KEY, worker_id)
+        pipe.set(cls.get_heartbeat_key(worker_id), 1, ex=cls.HEARTBEAT_TIMEOUT)
+        pipe.execute()
+
+    @classmethod
+    def release(cls, worker_id):
+        """
+        Queues the jobs the worker did not finish again and forgets the worker.
+        """
+        processing_key = cls.get_processing_key(worker_id)
+        while redis_client.lmove(processing_key, cls.QUEUE_KEY, "RIGHT", "RIGHT"):
+            pass
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.srem(cls.WORKERS_KEY, worker_id)
+        pipe.delete(cls.get_heartbeat_key(worker_id))
+        pipe.execute()
+
+    @classmethod
+    def recover(cls):
+        """
+        Releases the workers whose heartbeat expired.
+        """
+        for worker_id in redis_client.smembers(cls.WORKERS_KEY):
+            if not redis_client.exists(cls.get_heartbeat_key(worker_id)):
+                print(f"Recovering the SMS of worker {worker_id}")
+                cls.release(worker_id)
+
+    @classmethod
+    def promote_retries(cls):
+        """
+        Moves the retries that are due back to the queue.
+        """
+        now = time.time()
+        for item in redis_client.zrangebyscore(cls.RETRY_KEY, 0, now):
+            # Only the worker that removed it pushes it, when several workers promote at once
+            if redis_client.zrem(cls.RETRY_KEY, item):
+                redis_client.rpush(cls.QUEUE_KEY, item)
+
+    @classmethod
+    def process(cls, provider, job, worker_id, item):
+        """
+        Sends the job popped by the worker as item, schedules a retry if it fails, and
+        acknowledges it. Returns True when sent.
+        """
+        if job["expires_at"] and job["expires_at"] < time.time():
+            cls.ack(worker_id, item)
+            cls.record("expired")
+            return False
+        job["attempts"] += 1
+        start = time.perf_counter()
+        try:
+            provider.send(job["phone_number"], job["message"])
+        except PermanentSMSError as e:
+            print(f"Failed to send SMS {job['id']}: {e}")
+            cls.ack(worker_id, item)
+            cls.record("failed")
+            return False
+        except Exception as e:
+            if job["attempts"] >= SMS_MAX_ATTEMPTS:
+                print(f"Failed to send SMS {job['id']} after {job['attempts']} attempts: {e}")
+                cls.ack(worker_id, item)
+                cls.record("failed")
+                return False
+            delay = SMS_RETRY_DELAY * 2 ** (job["attempts"] - 1)
+            # Acknowledged once the retry is scheduled, it is not sent yet
+            redis_client.zadd(cls.RETRY_KEY, {json.dumps(job): time.time() + delay})
+            cls.ack(worker_id, item)
+            cls.record("retried")
+            return False
+        # Right after the send, nothing that fails later may queue it again
+        cls.ack(worker_id, item)
+        cls.record(
+            "sent",
+            send_ms=(time.perf_counter() - start) * 1000,
+            queue_ms=(time.time() - job["enqueued_at"]) * 1000,
+        )
+        return True
+
+    @classmethod
+    def record(cls, outcome, send_ms=None, queue_ms=None):
+        """
+        Counts the outcome in the metrics, best effort.
+        """
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(cls.METRICS_KEY, outcome, 1)
+        for name, value in (("send_ms", send_ms), ("queue_ms", queue_ms)):
+            if value is None:
+                continue
+            pipe.hincrbyfloat(cls.METRICS_KEY, f"{name}_sum", value)
+            for bucket in SMS_LATENCY_BUCKETS:
+                if value <= bucket:
+                    pipe.hincrby(cls.METRICS_KEY, f"{name}_le_{bucket}", 1)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Failed to record the SMS metrics: {e}")
+
+    @classmethod
+    def get_metrics(cls):
+        """
+        Queue depth, outcome counters and latency histograms, in ms, with cumulative buckets.
+        """
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.llen(cls.QUEUE_KEY)
+        pipe.zcard(cls.RETRY_KEY)
+        pipe.hgetall(cls.METRICS_KEY)
+        pipe.scard(cls.WORKERS_KEY)
+        queued, retrying, counters, workers = pipe.execute()
+        sent = int(counters.get("sent", 0))
+        latency = {}
+        for name in ("send_ms", "queue_ms"):
+            latency[name] = {
+                "count": sent,
+                "sum": float(counters.get(f"{name}_sum", 0)),
+                "buckets": {
+                    str(bucket): int(counters.get(f"{name}_le_{bucket}", 0))
+                    for bucket in SMS_LATENCY_BUCKETS
+                },
+            }
+        return {
+            "provider": SMS_PROVIDER,
+            "workers": workers,
+            "queued": queued,
+            "retrying": retrying,
+            "sent": sent,
+            "retried": int(counters.get("retried", 0)),
+            "failed": int(counters.get("failed", 0)),
+            "expired": int(counters.get("expired", 0)),
+            "latency": latency,
+        }
@@ -1,7 +1,15 @@
+import hashlib
+import threading
+import time
+from cachetools import TTLCache
+from django.core.cache import cache
 from storages.backends.s3boto3 import S3Boto3Storage
 from razexOne.settings import (
     PUBLIC_MEDIA_LOCATION,
     PRIVATE_MEDIA_LOCATION,
+    PRIVATE_MEDIA_URL_EXPIRY,
+    PRIVATE_MEDIA_URL_CACHE_MARGIN,
+    PRIVATE_MEDIA_URL_LOCAL_CACHE_SIZE,
 )
 
 
@@ -12,7 +20,76 @@ class PublicMediaStorage(S3Boto3Storage):
 
 
 class PrivateMediaStorage(S3Boto3Storage):
+    """
+    Signed urls are reused until PRIVATE_MEDIA_URL_CACHE_MARGIN seconds before they
+    expire, from a per process cache in front of the shared Django cache, instead of
+    signing a new url every time a file is serialized.
+    """
+
     location = PRIVATE_MEDIA_LOCATION
     default_acl = "private"  # Private access
     file_overwrite = False
     custom_domain = False  # No public access
+    querystring_expire = PRIVATE_MEDIA_URL_EXPIRY
+
+    _local_urls = TTLCache(
+        maxsize=PRIVATE_MEDIA_URL_LOCAL_CACHE_SIZE,
+        ttl=PRIVATE_MEDIA_URL_EXPIRY - PRIVATE_MEDIA_URL_CACHE_MARGIN,
+    )
+    _local_lock = threading.Lock()
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        # Only the default urls are cached
+        if parameters or expire or http_method:
+            return super().url(name, parameters, expire, http_method)
+        return self.get_urls([name])[name]
+
+    def get_urls(self, names):
+        """
+        Signed urls of the files, by name. Use it to sign the files of a list at once,
+        the urls are then served from the local cache when the files are serialized.
+        """
+        urls = {}
+        missing = {}
+        now = time.time()
+        with self._local_lock:
+            for name in names:
+                key = self._url_cache_key(name)
+                url, valid_until = self._local_urls.get(key, (None, 0))
+                if valid_until > now:
+                    urls[name] = url
+                else:
+                    missing[key] = name
+        if not missing:
+            return urls
+
+        cached = cache.get_many(missing.keys())
+        signed = {}
+        for key, name in missing.items():
+            if key not in cached:
+                url = super().url(name)
+                cached[key] = signed[key] = (
+                    url,
+                    now + self.querystring_expire - PRIVATE_MEDIA_URL_CACHE_MARGIN,
+                )
+        if signed:
+            cache.set_many(signed, timeout=self.querystring_expire - PRIVATE_MEDIA_URL_CACHE_MARGIN)
+        with self._local_lock:
+            for key, name in missing.items():
+                self._local_urls[key] = cached[key]
+                urls[name] = cached[key][0]
+        return urls
+
+    def _url_cache_key(self, name):
+        digest = hashlib.sha256(self._normalize_name(name).encode()).hexdigest()
+        return f"private_media_url_{digest}"
+
+
+def prefetch_urls(instances, field_name):
+    """
+    Sign the private files of the field for all the instances at once before serializing them.
+    """
+    files = [getattr(instance, field_name) for instance in instances]
+    files = [file for file in files if file]
+    if files and isinstance(files[0].storage, PrivateMediaStorage):
+        files[0].storage.get_urls([file.name for file in files])